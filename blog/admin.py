@@ -5,10 +5,10 @@ from .models import Like, Post, SubPost
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ["title", "author", "created_at", "views_count"]
+    list_display = ["title", "author", "created_at", "views_count", "likes_count"]
     list_filter = ["created_at", "author"]
     search_fields = ["title", "body"]
-    readonly_fields = ["created_at", "updated_at", "views_count"]
+    readonly_fields = ["created_at", "updated_at", "views_count", "likes_count"]
 
 
 @admin.register(SubPost)
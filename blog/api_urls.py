@@ -6,10 +6,18 @@ urlpatterns = [
     # Post URLs
     path("posts/", api_views.PostListCreateView.as_view(), name="post-list-create"),
     path("posts/<int:pk>/", api_views.PostDetailView.as_view(), name="post-detail"),
-    path("posts/bulk/", api_views.bulk_create_posts, name="post-bulk-create"),
+    path("posts/bulk/", api_views.bulk_posts, name="post-bulk-create"),
+    path("posts/likes/", api_views.like_state, name="post-like-state"),
+    path("posts/search/", api_views.search_posts, name="post-search"),
+    path("posts/export/", api_views.export_posts, name="post-export"),
+    path("posts/trending/", api_views.trending_posts, name="post-trending"),
     path("posts/<int:pk>/like/", api_views.like_post, name="post-like"),
     path("posts/<int:pk>/view/", api_views.view_post, name="post-view"),
     # SubPost URLs
     path("subposts/", api_views.SubPostListCreateView.as_view(), name="subpost-list-create"),
     path("subposts/<int:pk>/", api_views.SubPostDetailView.as_view(), name="subpost-detail"),
+    # Author URLs
+    path("authors/<int:pk>/stats/", api_views.author_stats_detail, name="author-stats"),
+    # Cache URLs
+    path("cache/stats/", api_views.response_cache_stats, name="response-cache-stats"),
 ]
@@ -1,17 +1,68 @@
-from django.db import transaction
+import json
+import math
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
 
-from .models import Like, Post, SubPost
+from . import author_stats, bulk, export, response_cache, search, trending
+from .async_routing import streaming_content
+from .conditional import ConditionalRequestMixin
+from .db_router import ReplicaReadMixin, pin_primary_on_write
+from .fast_serialization import post_values, serialize_posts, serialize_subposts, subpost_values
+from .locking import retry_on_lock
+from .models import MAX_PK, Like, Post, SubPost, TrendingScore
+from .response_cache import ResponseCacheMixin
 from .serializers import (
+    PostBulkSerializer,
+    PostBulkUpdateSerializer,
     PostCreateManySerializer,
     PostSerializer,
     SubPostDetailSerializer,
 )
+from .sparse_fields import SparseFieldsMixin
+from .view_buffer import record_view
+
+
+def post_validators_queryset(pk, user):
+    """Валидаторы поста одним запросом, без загрузки объекта и под-постов"""
+    return (
+        Post.objects.filter(pk=pk)
+        .with_liked_by_me(user)
+        .order_by()
+        .annotate(subposts_updated=Max("subposts__updated_at"), subposts_total=Count("subposts"))
+        .values_list(
+            "updated_at",
+            "likes_count",
+            "views_count",
+            "subposts_updated",
+            "subposts_total",
+            "liked_by_me",
+        )
+    )
+
+
+def post_validators(row):
+    """(last_modified, значения для ETag) по строке post_validators_queryset.
+
+    Last-Modified у поста не отдается: лайки, просмотры и удаление под-поста
+    не сдвигают ни одну дату, поэтому If-Modified-Since давал бы устаревший 304.
+    Все эти изменения видны в ETag (счетчики, число и дата под-постов).
+    """
+    if row is None:
+        return None
+    return None, row
 
 
 class PostPagination(PageNumberPagination):
@@ -22,45 +73,204 @@ class PostPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class PostListCreateView(generics.ListCreateAPIView):
-    """Список постов с пагинацией и создание поста"""
+class PostCursorPagination(CursorPagination):
+    """Курсорная пагинация для постов по (created_at, id) без OFFSET и COUNT(*)"""
+
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class PostListCreateView(
+    ReplicaReadMixin, ResponseCacheMixin, SparseFieldsMixin, generics.ListCreateAPIView
+):
+    """Список постов с пагинацией и создание поста.
+
+    По умолчанию используется постраничная пагинация, курсорная включается
+    параметром ``?pagination=cursor``.
+    """
 
-    queryset = Post.objects.all().prefetch_related("subposts", "likes")
+    queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = PostPagination
+    cache_endpoint = "post-list"
+    body_preview_allowed = True
+    sparse_prefetch = ("subposts",)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params
+            if params.get("pagination") == "cursor" or "cursor" in params:
+                self._paginator = PostCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.is_field_requested("author"):
+            queryset = queryset.select_related("author")
+        if self.is_field_requested("liked_by_me"):
+            queryset = queryset.with_liked_by_me(self.request.user)
+        return queryset
+
+    def get_sparse_required_fields(self):
+        # Курсор строится по created_at последнего поста страницы
+        if isinstance(self.paginator, PostCursorPagination):
+            return ("created_at",)
+        return ()
+
+    def list(self, request, *args, **kwargs):
+        if self.sparse_params or not getattr(settings, "BLOG_FAST_LIST_SERIALIZATION", True):
+            return super().list(request, *args, **kwargs)
+
+        # Быстрый путь: строки .values() вместо экземпляров моделей и сериализаторов
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        page = self.paginate_queryset(post_values(queryset))
+        return self.get_paginated_response(serialize_posts(page))
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+        response_cache.bump_posts()
 
 
-class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PostDetailView(
+    ReplicaReadMixin,
+    ConditionalRequestMixin,
+    ResponseCacheMixin,
+    SparseFieldsMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     """Детали, обновление и удаление поста"""
 
-    queryset = Post.objects.all().prefetch_related("subposts", "likes")
+    queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    cache_endpoint = "post-detail"
+    sparse_prefetch = ("subposts",)
+
+    def get_cache_version_key(self):
+        return response_cache.post_version_key(self.kwargs["pk"])
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.is_field_requested("author"):
+            queryset = queryset.select_related("author")
+        if self.is_field_requested("liked_by_me"):
+            queryset = queryset.with_liked_by_me(self.request.user)
+        return queryset
+
+    def get_validators(self):
+        return post_validators(
+            post_validators_queryset(self.kwargs["pk"], self.request.user).first()
+        )
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        response_cache.bump_post(serializer.instance.pk)
 
+    def perform_destroy(self, instance):
+        pk = instance.pk
+        with transaction.atomic():
+            super().perform_destroy(instance)
+            author_stats.add_author_deltas(
+                instance.author_id,
+                posts=-1,
+                views=-instance.views_count,
+                likes=-instance.likes_count,
+            )
+        response_cache.bump_post(pk)
 
-class SubPostListCreateView(generics.ListCreateAPIView):
-    """Список и создание под-постов"""
 
-    queryset = SubPost.objects.all().select_related("post")
+class SubPostListCreateView(ReplicaReadMixin, SparseFieldsMixin, generics.ListCreateAPIView):
+    """Список и создание под-постов.
+
+    С параметром ``?stream=ndjson`` (или заголовком ``Accept: application/x-ndjson``)
+    список отдается потоком NDJSON по одной строке на под-пост.
+    """
+
+    # Сериализатору нужен только post_id, JOIN с постом не требуется
+    queryset = SubPost.objects.all()
     serializer_class = SubPostDetailSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = None  # Отключаем пагинацию для субпостов
+    body_preview_allowed = True
+
+    def list(self, request, *args, **kwargs):
+        accept = request.headers.get("Accept", "")
+        if request.query_params.get("stream") == "ndjson" or "application/x-ndjson" in accept:
+            return self.stream_ndjson()
+        if self.sparse_params or not getattr(settings, "BLOG_FAST_LIST_SERIALIZATION", True):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(serialize_subposts(subpost_values(queryset)))
+
+    def stream_ndjson(self):
+        """Потоковая выдача под-постов без загрузки всей таблицы в память"""
+        queryset = self.filter_queryset(self.get_queryset())
+        chunk_size = getattr(settings, "BLOG_STREAM_CHUNK_SIZE", 2000)
+
+        def rows():
+            for subpost in queryset.iterator(chunk_size=chunk_size):
+                data = self.get_serializer(subpost).data
+                yield json.dumps(data, cls=JSONEncoder, ensure_ascii=False) + "\n"
 
+        return StreamingHttpResponse(
+            streaming_content(self.request, rows()), content_type="application/x-ndjson"
+        )
 
-class SubPostDetailView(generics.RetrieveUpdateDestroyAPIView):
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        response_cache.bump_post(serializer.instance.post_id)
+
+
+class SubPostDetailView(
+    ReplicaReadMixin,
+    ConditionalRequestMixin,
+    SparseFieldsMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     """Детали, обновление и удаление под-поста"""
 
-    queryset = SubPost.objects.all().select_related("post")
+    queryset = SubPost.objects.all()
     serializer_class = SubPostDetailSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def get_validators(self):
+        row = (
+            SubPost.objects.filter(pk=self.kwargs["pk"])
+            .values_list("updated_at", "post_id")
+            .first()
+        )
+        if row is None:
+            return None
+        return row[0], row
 
-@api_view(["POST"])
+    def perform_update(self, serializer):
+        old_post_id = serializer.instance.post_id
+        super().perform_update(serializer)
+        response_cache.bump_post(old_post_id, serializer.instance.post_id)
+
+    def perform_destroy(self, instance):
+        post_id = instance.post_id
+        super().perform_destroy(instance)
+        response_cache.bump_post(post_id)
+
+
+@api_view(["POST", "PATCH", "DELETE"])
 @permission_classes([IsAuthenticated])
+@pin_primary_on_write
+def bulk_posts(request):
+    """Массовое создание (POST), изменение (PATCH) и удаление (DELETE) постов"""
+    if request.method == "POST":
+        return bulk_create_posts(request)
+    return bulk_write_posts(request)
+
+
 def bulk_create_posts(request):
     """Массовое создание постов"""
     serializer = PostCreateManySerializer(data=request.data)
@@ -71,36 +281,260 @@ def bulk_create_posts(request):
             post_data["author"] = request.user
 
         result = serializer.save()
+        response_cache.bump_posts()
         posts_serializer = PostSerializer(result["posts"], many=True)
         return Response(posts_serializer.data, status=status.HTTP_201_CREATED)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def bulk_write_posts(request):
+    """Изменение или удаление постов по ids или filter множественными UPDATE/DELETE.
+
+    Не-персонал может затронуть только свои посты: если среди выбранных есть
+    чужие, запрос отклоняется целиком.
+    """
+    serializer_class = PostBulkUpdateSerializer if request.method == "PATCH" else PostBulkSerializer
+    serializer = serializer_class(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    max_posts = bulk.get_max_posts()
+    targets = bulk.select_targets(serializer.validated_data, max_posts)
+    if len(targets) > max_posts:
+        return Response(
+            {"filter": [f"Под фильтр попадает больше {max_posts} постов, сузьте его."]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if not request.user.is_staff:
+        forbidden = [pk for pk, author_id in targets if author_id != request.user.pk]
+        if forbidden:
+            return Response(
+                {"detail": "Можно изменять только свои посты.", "forbidden_ids": forbidden},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+    post_ids = [pk for pk, _ in targets]
+    if request.method == "PATCH":
+        result = {"posts": bulk.update_posts(post_ids, serializer.validated_data["values"])}
+    else:
+        result = bulk.delete_posts(post_ids)
+    if post_ids:
+        response_cache.bump_post(*post_ids)
+    return Response(result)
+
+
+@retry_on_lock
+def toggle_like(pk, user):
+    """Поставить или убрать лайк одной транзакцией, вернуть (liked, likes_count)"""
+    if pk > MAX_PK:
+        # <int:pk> пропускает числа, которые БД не может сравнить с ключом
+        raise Http404(f"No {Post._meta.object_name} matches the given query.")
+    with transaction.atomic():
+        # Пытаемся убрать лайк; если его не было — ставим
+        deleted, _ = Like.objects.filter(post_id=pk, user=user).delete()
+        if deleted:
+            liked, delta = False, -1
+        else:
+            try:
+                with transaction.atomic():
+                    Like.objects.create(post_id=pk, user=user)
+                liked, delta = True, 1
+            except IntegrityError:
+                # Параллельный запрос того же пользователя уже поставил лайк
+                liked, delta = True, 0
+
+        likes_count = Post.apply_likes_delta(pk, delta)
+        if likes_count is None:
+            # Поста нет: откатываем транзакцию вместе со вставленным лайком
+            raise Http404(f"No {Post._meta.object_name} matches the given query.")
+        trending.refresh_scores([pk])
+        author_stats.add_post_deltas(pk, likes=delta)
+
+        response_cache.bump_post(pk)
+    return liked, likes_count
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@pin_primary_on_write
 def like_post(request, pk):
     """Лайкнуть/убрать лайк с поста"""
-    post = get_object_or_404(Post, pk=pk)
+    liked, likes_count = toggle_like(pk, request.user)
+    return Response({"liked": liked, "likes_count": likes_count})
 
-    with transaction.atomic():
-        like, created = Like.objects.get_or_create(post=post, user=request.user)
 
-        if created:
-            liked = True
-        else:
-            like.delete()
-            liked = False
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def like_state(request):
+    """Лайкнул ли текущий пользователь посты из ?ids=1,2,3 (одним запросом)"""
+    max_ids = getattr(settings, "BLOG_LIKE_STATE_MAX_IDS", 100)
+    try:
+        ids = {int(value) for value in request.query_params.get("ids", "").split(",") if value}
+        if not all(1 <= pk <= MAX_PK for pk in ids):
+            raise ValueError
+    except ValueError:
+        return Response(
+            {"ids": ["Ожидается список положительных целых чисел через запятую."]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(ids) > max_ids:
+        return Response(
+            {"ids": [f"Не более {max_ids} идентификаторов за запрос."]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
-        likes_count = post.likes.count()
+    liked = set(
+        Like.objects.filter(user=request.user, post_id__in=ids).values_list("post_id", flat=True)
+    )
+    return Response({"liked_by_me": {str(pk): pk in liked for pk in sorted(ids)}})
 
-    return Response({"liked": liked, "likes_count": likes_count})
+
+@retry_on_lock
+def count_view(pk):
+    """Засчитать просмотр вместе с рейтингом и статистикой автора, вернуть счетчик.
+
+    Возвращает None, если поста нет.
+    """
+    with transaction.atomic():
+        if not Post.objects.filter(pk=pk).update(views_count=F("views_count") + 1):
+            return None
+        trending.refresh_scores([pk])
+        author_stats.add_post_deltas(pk, views=1)
+        return Post.objects.filter(pk=pk).values_list("views_count", flat=True).get()
 
 
 @api_view(["GET"])
 def view_post(request, pk):
     """Увеличить счетчик просмотров поста"""
-    post = get_object_or_404(Post, pk=pk)
-    post.increment_views()
+    if getattr(settings, "BLOG_VIEWS_BUFFERED", False):
+        # Записанное значение плюс еще не сброшенные в БД просмотры
+        views_count = get_object_or_404(Post.objects.values_list("views_count", flat=True), pk=pk)
+        return Response({"views_count": views_count + record_view(pk)})
+
+    views_count = count_view(pk)
+    if views_count is None:
+        raise Http404(f"No {Post._meta.object_name} matches the given query.")
+    return Response({"views_count": views_count})
+
+
+@api_view(["GET"])
+def author_stats_detail(request, pk):
+    """Статистика автора из строки AuthorStats одним запросом, без агрегации по постам"""
+    username, *counters = get_object_or_404(
+        User.objects.values_list(
+            "username",
+            *(f"author_stats__{column}" for column in author_stats.COLUMNS),
+        ),
+        pk=pk,
+    )
+    return Response(
+        {
+            "author": {"id": pk, "username": username},
+            # Строки нет, пока у автора не было постов
+            **{column: value or 0 for column, value in zip(author_stats.COLUMNS, counters)},
+        }
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def response_cache_stats(request):
+    """Статистика кеша ответов: попадания, промахи и TTL по эндпойнтам"""
+    return Response(response_cache.get_stats())
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def export_posts(request):
+    """Потоковая выгрузка всех постов с под-постами: ?output=ndjson (по умолчанию) или csv"""
+    # Параметр ``format`` занят DRF под выбор рендерера
+    export_format = request.query_params.get("output", "ndjson")
+    if export_format not in export.FORMATS:
+        return Response(
+            {"output": [f"Допустимые значения: {', '.join(export.FORMATS)}."]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    response = StreamingHttpResponse(
+        streaming_content(request, export.export_lines(export_format)),
+        content_type=export.FORMATS[export_format],
+    )
+    response["Content-Disposition"] = f'attachment; filename="posts.{export_format}"'
+    return response
+
+
+def _score_cursor(request):
+    """(score, post_id) из параметра ?cursor= или None; ValueError — некорректный курсор"""
+    if not request.query_params.get("cursor"):
+        return None
+    try:
+        score, post_id = json.loads(urlsafe_b64decode(request.query_params["cursor"]))
+        score, post_id = float(score), int(post_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("некорректный курсор") from exc
+    # Значения вне диапазона БД не принимает (OverflowError драйвера)
+    if not (math.isfinite(score) and 1 <= post_id <= MAX_PK):
+        raise ValueError("некорректный курсор")
+    return score, post_id
+
+
+def _score_page(request, matches, limit):
+    """Страница постов в порядке matches [(post_id, score), ...] со ссылкой next.
+
+    ``matches`` содержит на одну строку больше страницы, если есть следующая.
+    """
+    has_next, matches = len(matches) > limit, matches[:limit]
+
+    ids = [post_id for post_id, _ in matches]
+    queryset = Post.objects.filter(pk__in=ids).with_liked_by_me(request.user)
+    posts = {post["id"]: post for post in serialize_posts(post_values(queryset))}
+
+    next_url = None
+    if has_next:
+        last_id, last_score = matches[-1]
+        cursor = urlsafe_b64encode(json.dumps([last_score, last_id]).encode()).decode()
+        next_url = replace_query_param(request.build_absolute_uri(), "cursor", cursor)
+
+    return Response({"next": next_url, "results": [posts[pk] for pk in ids if pk in posts]})
+
+
+def _invalid_cursor():
+    return Response({"cursor": ["Некорректный курсор."]}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(["GET"])
+def search_posts(request):
+    """Полнотекстовый поиск постов с курсорной пагинацией по (релевантность, id)"""
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return Response({"q": ["Обязательный параметр."]}, status=status.HTTP_400_BAD_REQUEST)
+
+    limit = PostPagination().get_page_size(request)
+    try:
+        after = _score_cursor(request)
+    except ValueError:
+        return _invalid_cursor()
+
+    # Берем на одну строку больше, чтобы узнать, есть ли следующая страница
+    return _score_page(request, search.search_posts(query, after=after, limit=limit + 1), limit)
+
+
+@api_view(["GET"])
+def trending_posts(request):
+    """Популярные посты по убыванию рейтинга, курсорная пагинация по (score, id).
+
+    Страница читается по индексу ``blog_trending_score_idx`` без COUNT(*) и
+    OFFSET, поэтому стоимость запроса зависит от размера страницы, а не таблицы.
+    """
+    limit = PostPagination().get_page_size(request)
+    try:
+        after = _score_cursor(request)
+    except ValueError:
+        return _invalid_cursor()
 
-    return Response({"views_count": post.views_count})
+    scores = TrendingScore.objects.order_by("-score", "-post_id")
+    if after is not None:
+        score, post_id = after
+        scores = scores.filter(Q(score__lt=score) | Q(score=score, post_id__lt=post_id))
+    matches = list(scores.values_list("post_id", "score")[: limit + 1])
+    return _score_page(request, matches, limit)
@@ -6,4 +6,4 @@ class BlogConfig(AppConfig):
     name = 'blog'
 
     def ready(self):
-        pass  # подключение сигналов для автоматического создания профиля
+        from . import signals  # noqa: F401 - подключение обработчиков сигналов
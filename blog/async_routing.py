@@ -0,0 +1,49 @@
+"""Маршруты и потоковые ответы для запросов, пришедших через ASGI.
+
+``AsyncUrlconfMiddleware`` подставляет ``request.urlconf`` из
+``BLOG_ASGI_URLCONF`` только для ``ASGIRequest``, поэтому один процесс и одни
+настройки обслуживают WSGI (синхронные DRF-представления) и ASGI (горячие
+эндпойнты из ``blog/async_views.py``) без подмены ``ROOT_URLCONF``.
+
+Под ASGI Django собирает синхронный итератор ``StreamingHttpResponse`` в список
+целиком (``sync_to_async(list)``). ``streaming_content`` отдает такому запросу
+async-итератор, который читает строки порциями в потоке, и потоковые ответы
+сохраняют постоянный расход памяти.
+"""
+
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.deprecation import MiddlewareMixin
+
+# Строк на один переход в поток синхронного кода
+STREAM_LINES_PER_CHUNK = 100
+
+
+class AsyncUrlconfMiddleware(MiddlewareMixin):
+    """Под ASGI маршруты берутся из BLOG_ASGI_URLCONF (None — из ROOT_URLCONF)"""
+
+    def process_request(self, request):
+        urlconf = getattr(settings, "BLOG_ASGI_URLCONF", None)
+        if urlconf and isinstance(request, ASGIRequest):
+            request.urlconf = urlconf
+
+
+def _next_lines(lines, size):
+    return list(islice(lines, size))
+
+
+async def _alines(lines, size):
+    # Все порции читаются в одном потоке (thread_sensitive), поэтому
+    # серверный курсор .iterator() остается на своем соединении
+    while chunk := await sync_to_async(_next_lines)(lines, size):
+        yield "".join(chunk)
+
+
+def streaming_content(request, lines):
+    """Содержимое StreamingHttpResponse: lines под WSGI, async-итератор под ASGI"""
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        return _alines(iter(lines), STREAM_LINES_PER_CHUNK)
+    return lines
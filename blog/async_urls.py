@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import async_views
+
+# Async-версии горячих эндпойнтов; остальные маршруты — из api_urls
+urlpatterns = [
+    path("posts/", async_views.post_list, name="post-list-create"),
+    path("posts/<int:pk>/", async_views.post_detail, name="post-detail"),
+    path("posts/<int:pk>/like/", async_views.like_post, name="post-like"),
+    path("posts/<int:pk>/view/", async_views.view_post, name="post-view"),
+]
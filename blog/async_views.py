@@ -0,0 +1,184 @@
+"""Async-версии горячих эндпойнтов для ASGI (``blog_project/asgi_urls.py``).
+
+DRF не поддерживает async-представления, поэтому здесь обычные async-функции
+Django на async ORM. Они обслуживают самый частый случай — простой GET без
+дополнительных параметров и лайк от пользователя с сессией. Все остальное
+(запись через формы DRF, ``?fields=``, курсорная пагинация, Basic-аутентификация,
+браузерный API, кеш ответов, реплика) передается синхронным DRF-представлениям,
+поэтому ответы совпадают с WSGI-версией.
+"""
+
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.authentication import CSRFCheck
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import api_views
+from .conditional import etag_and_last_modified, set_validators
+from .fast_serialization import aserialize_posts, post_values
+from .models import Post
+from .view_buffer import record_view
+
+_post_list = api_views.PostListCreateView.as_view()
+_post_detail = api_views.PostDetailView.as_view()
+_like_post = api_views.like_post
+_view_post = api_views.view_post
+
+_json_renderer = JSONRenderer()
+
+
+def _json(data, status=200):
+    return HttpResponse(_json_renderer.render(data), content_type="application/json", status=status)
+
+
+def _error(exc, status=None):
+    return _json({"detail": str(exc.detail)}, status=status or exc.status_code)
+
+
+def _not_found():
+    # Сообщение get_object_or_404, которое DRF отдает для Http404
+    return _error(exceptions.NotFound(f"No {Post._meta.object_name} matches the given query."))
+
+
+def _serves_async(request, allowed_params=()):
+    """Может ли запрос обслужить async-путь без потери совместимости с DRF"""
+    if "Authorization" in request.headers or "text/html" in request.headers.get("Accept", ""):
+        return False
+    if any(name not in allowed_params for name in request.GET):
+        return False
+    return not (
+        getattr(settings, "BLOG_RESPONSE_CACHE_ENABLED", False)
+        or getattr(settings, "BLOG_READ_REPLICA", None)
+        or not getattr(settings, "BLOG_FAST_LIST_SERIALIZATION", True)
+    )
+
+
+async def _delegate(view, request, *args, **kwargs):
+    """Передать запрос синхронному DRF-представлению"""
+    return await sync_to_async(view)(request, *args, **kwargs)
+
+
+@csrf_exempt
+async def post_list(request):
+    """GET /api/posts/ с постраничной пагинацией, как у PostPagination"""
+    if request.method != "GET" or not _serves_async(request, ("page", "page_size")):
+        return await _delegate(_post_list, request)
+
+    paginator = api_views.PostPagination()
+    try:
+        page_size = min(int(request.GET["page_size"]), paginator.max_page_size)
+        if page_size <= 0:
+            raise ValueError
+    except (KeyError, ValueError):
+        page_size = paginator.page_size
+
+    user = await request.auser()
+    queryset = Post.objects.all()
+    count = await queryset.acount()
+    last_page = max(1, math.ceil(count / page_size))
+    page = request.GET.get("page", "1")
+    try:
+        page = last_page if page in paginator.last_page_strings else int(page)
+        if not 1 <= page <= last_page:
+            raise ValueError
+    except ValueError:
+        return _error(exceptions.NotFound(paginator.invalid_page_message))
+
+    offset = (page - 1) * page_size
+    rows = post_values(queryset.with_liked_by_me(user)[offset : offset + page_size])
+    url = request.build_absolute_uri()
+    previous = None
+    if page > 1:
+        previous = (
+            remove_query_param(url, "page")
+            if page == 2
+            else replace_query_param(url, "page", page - 1)
+        )
+    return _json(
+        {
+            "count": count,
+            "next": replace_query_param(url, "page", page + 1) if page < last_page else None,
+            "previous": previous,
+            "results": await aserialize_posts(rows),
+        }
+    )
+
+
+@csrf_exempt
+async def post_detail(request, pk):
+    """GET /api/posts/{id}/ с ETag, как у PostDetailView"""
+    if request.method != "GET" or not _serves_async(request):
+        return await _delegate(_post_detail, request, pk=pk)
+
+    user = await request.auser()
+    validators = api_views.post_validators(
+        await api_views.post_validators_queryset(pk, user).afirst()
+    )
+    if validators is None:
+        return _not_found()
+    etag, last_modified = etag_and_last_modified(validators, request.GET, user)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        posts = await aserialize_posts(
+            post_values(Post.objects.filter(pk=pk).with_liked_by_me(user))
+        )
+        if not posts:
+            return _not_found()
+        response = _json(posts[0])
+    return set_validators(response, etag, last_modified)
+
+
+@csrf_exempt
+async def like_post(request, pk):
+    """POST /api/posts/{id}/like/ для пользователя с сессией"""
+    if request.method != "POST" or not _serves_async(request):
+        return await _delegate(_like_post, request, pk=pk)
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        # Без WWW-Authenticate у первой схемы аутентификации DRF отвечает 403
+        return _error(exceptions.NotAuthenticated(), status=403)
+    # Как SessionAuthentication в DRF: сессионные запросы на запись проверяют CSRF
+    check = CSRFCheck(lambda request: None)
+    check.process_request(request)
+    reason = check.process_view(request, None, (), {})
+    if reason:
+        return _error(exceptions.PermissionDenied(f"CSRF Failed: {reason}"))
+
+    # В async ORM нет транзакций, поэтому переключение лайка вместе со счетчиком
+    # выполняется одним вызовом синхронного кода
+    try:
+        liked, likes_count = await sync_to_async(api_views.toggle_like)(pk, user)
+    except Http404:
+        return _not_found()
+    return _json({"liked": liked, "likes_count": likes_count})
+
+
+@csrf_exempt
+async def view_post(request, pk):
+    """GET /api/posts/{id}/view/: запись одной синхронной транзакцией из цикла событий"""
+    if request.method != "GET" or not _serves_async(request):
+        return await _delegate(_view_post, request, pk=pk)
+
+    if getattr(settings, "BLOG_VIEWS_BUFFERED", False):
+        views_count = (
+            await Post.objects.filter(pk=pk).values_list("views_count", flat=True).afirst()
+        )
+        if views_count is None:
+            return _not_found()
+        # Буфер просмотров синхронный (блокировки потоков и кеша)
+        return _json({"views_count": views_count + await sync_to_async(record_view)(pk)})
+
+    # Счетчик, рейтинг и статистика автора меняются одной транзакцией
+    views_count = await sync_to_async(api_views.count_view)(pk)
+    if views_count is None:
+        return _not_found()
+    return _json({"views_count": views_count})
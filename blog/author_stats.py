@@ -0,0 +1,124 @@
+"""Материализованная статистика авторов для ``GET /api/authors/{id}/stats/``.
+
+Строка ``AuthorStats`` меняется одним ``INSERT ... ON CONFLICT DO UPDATE`` на
+приращение в той же транзакции, что и запись, которая ее меняет: создание и
+удаление постов, лайк, просмотр, сброс буфера просмотров и импорт. Счетчики не
+уходят в минус; массовое удаление постов вычитает их одним UPDATE
+(``subtract_posts``). Расхождения (например, после удаления пользователей, чьи лайки
+стояли на постах автора) исправляет ``manage.py reconcile_author_stats``.
+"""
+
+from django.db import connection
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import AuthorStats, Post
+
+COLUMNS = ("posts_count", "views_count", "likes_count")
+
+
+def _upsert(author, author_params, where, where_params, deltas):
+    """Прибавить deltas (посты, просмотры, лайки) к строке автора.
+
+    ``author`` — SQL-выражение id автора, ``where`` — хвост SELECT (FROM/WHERE).
+    """
+    qn = connection.ops.quote_name
+    table = qn(AuthorStats._meta.db_table)
+    updates = ", ".join(
+        f"{qn(column)} = CASE WHEN {table}.{qn(column)} + %s < 0 THEN 0 "
+        f"ELSE {table}.{qn(column)} + %s END"
+        for column in COLUMNS
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (user_id, {', '.join(map(qn, COLUMNS))}, updated_at) "
+            f"SELECT {author}, %s, %s, %s, %s {where} "
+            f"ON CONFLICT (user_id) DO UPDATE SET {updates}, updated_at = excluded.updated_at",
+            [
+                *author_params,
+                *(max(delta, 0) for delta in deltas),
+                connection.ops.adapt_datetimefield_value(timezone.now()),
+                *where_params,
+                *(value for delta in deltas for value in (delta, delta)),
+            ],
+        )
+
+
+def add_author_deltas(author_id, posts=0, views=0, likes=0):
+    """Изменить статистику автора на заданные приращения"""
+    if posts or views or likes:
+        # SQLite требует WHERE у INSERT ... SELECT с ON CONFLICT
+        _upsert("%s", [author_id], "WHERE 1 = 1", [], (posts, views, likes))
+
+
+def add_post_deltas(post_id, views=0, likes=0):
+    """Изменить статистику автора поста без отдельного SELECT автора"""
+    if views or likes:
+        qn = connection.ops.quote_name
+        _upsert(
+            "author_id",
+            [],
+            f"FROM {qn(Post._meta.db_table)} WHERE id = %s",
+            [post_id],
+            (0, views, likes),
+        )
+
+
+def rebuild(start, stop, dry_run=False):
+    """Пересчитать строки авторов с id из [start, stop) по их постам, вернуть число расхождений.
+
+    Для авторов без постов строка удаляется: эндпойнт отдает для них нули.
+    """
+    rows = (
+        Post.objects.filter(author_id__gte=start, author_id__lt=stop)
+        .order_by()
+        .values("author_id")
+        .annotate(posts=Count("id"), views=Sum("views_count"), likes=Sum("likes_count"))
+        .values_list("author_id", "posts", "views", "likes")
+    )
+    totals = {row[0]: row[1:] for row in rows}
+    current = {
+        row[0]: row[1:]
+        for row in AuthorStats.objects.filter(user_id__gte=start, user_id__lt=stop).values_list(
+            "user_id", *COLUMNS
+        )
+    }
+    stale = [
+        author_id for author_id, counters in totals.items() if current.get(author_id) != counters
+    ]
+    orphans = current.keys() - totals.keys()
+    if not dry_run:
+        AuthorStats.objects.filter(user_id__in=orphans).delete()
+        AuthorStats.objects.bulk_create(
+            (
+                AuthorStats(user_id=author_id, **dict(zip(COLUMNS, totals[author_id])))
+                for author_id in stale
+            ),
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=[*COLUMNS, "updated_at"],
+        )
+    return len(stale) + len(orphans)
+
+
+def subtract_posts(post_ids):
+    """Вычесть из статистики авторов посты post_ids перед их удалением.
+
+    Один ``UPDATE ... FROM`` по сгруппированным по автору счетчикам постов.
+    """
+    qn = connection.ops.quote_name
+    table = qn(AuthorStats._meta.db_table)
+    totals = {"posts_count": "d.posts", "views_count": "d.views", "likes_count": "d.likes"}
+    updates = ", ".join(
+        f"{qn(column)} = CASE WHEN {qn(column)} < {total} THEN 0 ELSE {qn(column)} - {total} END"
+        for column, total in totals.items()
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET {updates}, updated_at = %s "
+            "FROM (SELECT author_id, COUNT(*) AS posts, SUM(views_count) AS views, "
+            f"SUM(likes_count) AS likes FROM {qn(Post._meta.db_table)} "
+            f"WHERE id IN ({', '.join(['%s'] * len(post_ids))}) GROUP BY author_id) AS d "
+            f"WHERE {table}.user_id = d.author_id",
+            [connection.ops.adapt_datetimefield_value(timezone.now()), *post_ids],
+        )
@@ -0,0 +1,79 @@
+"""Массовое изменение и удаление постов для ``PATCH`` и ``DELETE /api/posts/bulk/``.
+
+Посты выбираются одним запросом (id и автор), по нему же проверяется владелец.
+Дальше запись идет пакетами по id (``BLOG_BULK_WRITE_BATCH_SIZE``) без загрузки
+моделей: изменение — одним UPDATE на пакет, удаление — прямыми DELETE лайков,
+под-постов и рейтинга до самих постов вместо сборщика каскадов Django, который
+читает каждый связанный объект. Статистика авторов уменьшается одним UPDATE на
+пакет, поисковый индекс обновляют триггеры БД.
+"""
+
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+
+from . import author_stats
+from .locking import retry_on_lock
+from .models import Like, Post, SubPost, TrendingScore
+
+# Поле фильтра -> lookup по Post
+FILTER_LOOKUPS = {
+    "author": "author_id",
+    "created_after": "created_at__gte",
+    "created_before": "created_at__lt",
+    "title_contains": "title__icontains",
+}
+
+
+def get_max_posts():
+    return getattr(settings, "BLOG_BULK_MAX_POSTS", 5000)
+
+
+def select_targets(target, limit):
+    """(id, author_id) постов по ``ids`` или ``filter``, не больше limit + 1 строки.
+
+    Лишняя строка показывает вызывающему, что под условие попало больше limit.
+    """
+    queryset = Post.objects.order_by("pk")
+    if "ids" in target:
+        queryset = queryset.filter(pk__in=target["ids"])
+    else:
+        lookups = {FILTER_LOOKUPS[name]: value for name, value in target["filter"].items()}
+        queryset = queryset.filter(**lookups)
+    return list(queryset.values_list("pk", "author_id")[: limit + 1])
+
+
+def _batches(post_ids):
+    batch_size = getattr(settings, "BLOG_BULK_WRITE_BATCH_SIZE", 500)
+    for offset in range(0, len(post_ids), batch_size):
+        yield post_ids[offset : offset + batch_size]
+
+
+def _raw_delete(queryset):
+    """DELETE ... WHERE без сборщика каскадов и сигналов, вернуть число строк"""
+    return queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+@retry_on_lock
+def update_posts(post_ids, values):
+    """Изменить поля values у постов post_ids, вернуть число измененных постов"""
+    updated = 0
+    with transaction.atomic():
+        for batch in _batches(post_ids):
+            updated += Post.objects.filter(pk__in=batch).update(**values, updated_at=timezone.now())
+    return updated
+
+
+@retry_on_lock
+def delete_posts(post_ids):
+    """Удалить посты post_ids вместе со связанными строками, вернуть число удаленных строк"""
+    counts = {"posts": 0, "subposts": 0, "likes": 0}
+    with transaction.atomic():
+        for batch in _batches(post_ids):
+            # Статистика читает счетчики удаляемых постов, поэтому идет первой
+            author_stats.subtract_posts(batch)
+            counts["likes"] += _raw_delete(Like.objects.filter(post_id__in=batch))
+            counts["subposts"] += _raw_delete(SubPost.objects.filter(post_id__in=batch))
+            _raw_delete(TrendingScore.objects.filter(post_id__in=batch))
+            counts["posts"] += _raw_delete(Post.objects.filter(pk__in=batch))
+    return counts
@@ -0,0 +1,67 @@
+"""Условные запросы (ETag / Last-Modified) для detail-представлений"""
+
+import hashlib
+
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def etag_and_last_modified(validators, query_params, user):
+    """ETag и Last-Modified (timestamp или None) по результату get_validators"""
+    last_modified, etag_values = validators
+    # Параметры запроса (fields, omit) и пользователь (liked_by_me) меняют
+    # представление, поэтому входят в ETag
+    query = sorted(query_params.lists())
+    etag = quote_etag(hashlib.md5(repr((etag_values, query, user.pk)).encode()).hexdigest())
+    if last_modified is None:
+        return etag, None
+    return etag, int(last_modified.timestamp())
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+class ConditionalRequestMixin:
+    """Отвечает 304 на совпадающий If-None-Match / If-Modified-Since и 412 на
+    устаревший If-Match при PUT/PATCH. Валидаторы читаются одним запросом
+    без загрузки объекта и запуска сериализатора."""
+
+    def get_validators(self):
+        """Вернуть (last_modified или None, значения для ETag) или None, если объекта нет"""
+        raise NotImplementedError
+
+    def get_etag_and_last_modified(self):
+        validators = self.get_validators()
+        if validators is None:
+            # То же сообщение, что у get_object_or_404 в базовом get_object
+            model = self.queryset.model
+            raise Http404(f"No {model._meta.object_name} matches the given query.")
+        return etag_and_last_modified(validators, self.request.query_params, self.request.user)
+
+    def conditional_response(self, request):
+        etag, last_modified = self.get_etag_and_last_modified()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        return response, etag, last_modified
+
+    def set_validators(self, response, etag, last_modified):
+        return set_validators(response, etag, last_modified)
+
+    def get(self, request, *args, **kwargs):
+        response, etag, last_modified = self.conditional_response(request)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified)
+
+    def update(self, request, *args, **kwargs):
+        response, etag, last_modified = self.conditional_response(request)
+        if response is not None:
+            return response
+
+        response = super().update(request, *args, **kwargs)
+        etag, last_modified = self.get_etag_and_last_modified()
+        return self.set_validators(response, etag, last_modified)
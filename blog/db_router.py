@@ -0,0 +1,100 @@
+"""Чтение безопасных запросов с реплики БД.
+
+``PrimaryReplicaRouter`` направляет чтения на алиас ``BLOG_READ_REPLICA``, только
+пока выполняется GET/HEAD/OPTIONS-запрос представления с ``ReplicaReadMixin``;
+все остальные чтения и любые записи идут в ``default``. После успешной записи
+пользователь в течение ``BLOG_REPLICA_STICKY_SECONDS`` читает с основной БД,
+чтобы видеть свои изменения, даже если реплика отстает.
+"""
+
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_PREFIX = "blog:primary:"
+
+_read_alias = ContextVar("blog_read_alias", default=None)
+
+
+def get_replica_alias():
+    """Алиас реплики или None, если он не задан или отсутствует в DATABASES"""
+    alias = getattr(settings, "BLOG_READ_REPLICA", None)
+    return alias if alias in settings.DATABASES else None
+
+
+def _pin_key(user):
+    return f"{PIN_PREFIX}{user.pk}"
+
+
+def pin_primary(user):
+    """Закрепить чтения пользователя за основной БД на время задержки репликации"""
+    if user.is_authenticated:
+        cache.set(_pin_key(user), True, getattr(settings, "BLOG_REPLICA_STICKY_SECONDS", 5))
+
+
+def is_pinned(user):
+    return user.is_authenticated and cache.get(_pin_key(user), False)
+
+
+def pin_primary_on_write(view):
+    """Декоратор функций-представлений: успешная запись закрепляет пользователя за primary"""
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_primary(request.user)
+        return response
+
+    return wrapped
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, get_replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы представления читают с реплики, записи закрепляют primary"""
+
+    read_alias = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        replica = get_replica_alias()
+        if replica and request.method in SAFE_METHODS and not is_pinned(request.user):
+            self.read_alias = replica
+            self._read_alias_token = _read_alias.set(replica)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Явная привязка нужна для ленивых ответов (NDJSON), которые читают из БД
+        # уже после выхода из представления
+        if self.read_alias:
+            queryset = queryset.using(self.read_alias)
+        return queryset
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_read_alias_token", None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._read_alias_token = None
+        elif request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,129 @@
+"""Потоковая выгрузка всех постов с под-постами в NDJSON и CSV.
+
+Посты читаются по возрастанию id, под-посты группируются по посту по мере
+чтения, поэтому в памяти находится не больше одной порции строк, сколько бы
+постов ни было в БД.
+
+PostgreSQL: посты и под-посты (по ``post_id, id``) читаются двумя серверными
+курсорами ``.iterator()`` и сливаются в один поток.
+SQLite: порции постов по ключу ``id > последний`` и под-посты каждой порции
+одним запросом по диапазону ``post_id``; курсор между порциями не держится.
+"""
+
+import csv
+import json
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.utils.encoders import JSONEncoder
+
+from .fast_serialization import POST_COLUMNS, SUBPOST_COLUMNS, post_item, subpost_item
+from .models import Post, SubPost
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+CSV_HEADER = (
+    "id",
+    "title",
+    "body",
+    "author_id",
+    "author_username",
+    "author_email",
+    "created_at",
+    "updated_at",
+    "views_count",
+    "likes_count",
+    "subposts",
+)
+
+
+def get_chunk_size(chunk_size=None):
+    return chunk_size or getattr(settings, "BLOG_STREAM_CHUNK_SIZE", 2000)
+
+
+def _posts(using):
+    return Post.objects.using(using).order_by("id").values(*POST_COLUMNS)
+
+
+def _subposts(using):
+    return SubPost.objects.using(using).order_by("post_id", "id").values(*SUBPOST_COLUMNS)
+
+
+def iter_posts_merged(chunk_size=None, using=DEFAULT_DB_ALIAS):
+    """Слияние двух потоков, упорядоченных по id поста (серверные курсоры)"""
+    chunk_size = get_chunk_size(chunk_size)
+    subposts = _subposts(using).iterator(chunk_size=chunk_size)
+    pending = next(subposts, None)
+    for row in _posts(using).iterator(chunk_size=chunk_size):
+        # Под-посты удаленных за время выгрузки постов пропускаются
+        while pending is not None and pending["post_id"] < row["id"]:
+            pending = next(subposts, None)
+        items = []
+        while pending is not None and pending["post_id"] == row["id"]:
+            items.append(subpost_item(pending))
+            pending = next(subposts, None)
+        yield post_item(row, items, liked_by_me=False)
+
+
+def iter_posts_keyset(chunk_size=None, using=DEFAULT_DB_ALIAS):
+    """Порции постов по ключу id и под-посты порции одним запросом"""
+    chunk_size = get_chunk_size(chunk_size)
+    last_id = 0
+    while True:
+        rows = list(_posts(using).filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        first_id, last_id = rows[0]["id"], rows[-1]["id"]
+        subposts = {}
+        for subpost in _subposts(using).filter(post_id__gte=first_id, post_id__lte=last_id):
+            subposts.setdefault(subpost["post_id"], []).append(subpost_item(subpost))
+        for row in rows:
+            yield post_item(row, subposts.get(row["id"], []), liked_by_me=False)
+
+
+def iter_posts(chunk_size=None, using=DEFAULT_DB_ALIAS):
+    """Все посты по возрастанию id, каждый со списком под-постов"""
+    if connections[using].vendor == "postgresql":
+        return iter_posts_merged(chunk_size, using)
+    return iter_posts_keyset(chunk_size, using)
+
+
+def ndjson_lines(posts):
+    for post in posts:
+        yield json.dumps(post, cls=JSONEncoder, ensure_ascii=False) + "\n"
+
+
+class _Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(posts):
+    """Одна строка на пост; под-посты — JSON-массивом в колонке subposts"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for post in posts:
+        author = post["author"]
+        yield writer.writerow(
+            (
+                post["id"],
+                post["title"],
+                post["body"],
+                author["id"],
+                author["username"],
+                author["email"],
+                post["created_at"],
+                post["updated_at"],
+                post["views_count"],
+                post["likes_count"],
+                json.dumps(post["subposts"], ensure_ascii=False),
+            )
+        )
+
+
+def export_lines(export_format, chunk_size=None, using=DEFAULT_DB_ALIAS):
+    """Строки выгрузки в формате ``ndjson`` или ``csv``"""
+    lines = ndjson_lines if export_format == "ndjson" else csv_lines
+    return lines(iter_posts(chunk_size, using))
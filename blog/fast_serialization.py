@@ -0,0 +1,125 @@
+"""Быстрая read-only сериализация списков постов и под-постов.
+
+Ответ собирается из строк ``.values()`` без создания экземпляров моделей
+и сериализаторов DRF. JSON совпадает с выводом ``PostSerializer`` и
+``SubPostDetailSerializer`` байт в байт.
+"""
+
+from collections import defaultdict
+
+from rest_framework import serializers
+
+from .models import SubPost
+from .timing import section
+
+POST_COLUMNS = (
+    "id",
+    "title",
+    "body",
+    "author_id",
+    "author__username",
+    "author__email",
+    "created_at",
+    "updated_at",
+    "views_count",
+    "likes_count",
+)
+SUBPOST_COLUMNS = ("id", "title", "body", "post_id", "created_at", "updated_at")
+
+# Тот же формат даты и часовой пояс, что и у полей ModelSerializer
+_datetime = serializers.DateTimeField().to_representation
+
+
+def post_values(queryset):
+    """Queryset строк постов для serialize_posts"""
+    columns = POST_COLUMNS
+    if "liked_by_me" in queryset.query.annotations:
+        columns += ("liked_by_me",)
+    return queryset.values(*columns)
+
+
+def subpost_values(queryset):
+    """Queryset строк под-постов для serialize_subposts"""
+    return queryset.values(*SUBPOST_COLUMNS)
+
+
+def subpost_item(row):
+    """Под-пост из строки subpost_values в формате вложенного списка PostSerializer"""
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "body": row["body"],
+        "created_at": _datetime(row["created_at"]),
+        "updated_at": _datetime(row["updated_at"]),
+    }
+
+
+def post_item(row, subposts, liked_by_me=True):
+    """Пост из строки post_values в формате PostSerializer.
+
+    ``liked_by_me=False`` опускает поле, зависящее от пользователя (выгрузка).
+    """
+    item = {
+        "id": row["id"],
+        "title": row["title"],
+        "body": row["body"],
+        "author": {
+            "id": row["author_id"],
+            "username": row["author__username"],
+            "email": row["author__email"],
+        },
+        "created_at": _datetime(row["created_at"]),
+        "updated_at": _datetime(row["updated_at"]),
+        "views_count": row["views_count"],
+        "likes_count": row["likes_count"],
+    }
+    if liked_by_me:
+        item["liked_by_me"] = bool(row.get("liked_by_me", False))
+    item["subposts"] = subposts
+    return item
+
+
+def _subposts_by_post(subpost_rows):
+    subposts = defaultdict(list)
+    for row in subpost_rows:
+        subposts[row["post_id"]].append(subpost_item(row))
+    return subposts
+
+
+def _post_items(rows, subposts):
+    return [post_item(row, subposts[row["id"]]) for row in rows]
+
+
+def _subposts_of(rows):
+    return subpost_values(SubPost.objects.filter(post_id__in=[row["id"] for row in rows]))
+
+
+@section("serializer")
+def serialize_posts(rows):
+    """Представление постов как у PostSerializer(many=True).data"""
+    rows = list(rows)
+    subposts = _subposts_by_post(_subposts_of(rows) if rows else ())
+    return _post_items(rows, subposts)
+
+
+async def aserialize_posts(rows):
+    """То же, что serialize_posts, для async-представлений (асинхронная итерация ORM)"""
+    rows = [row async for row in rows]
+    subpost_rows = [row async for row in _subposts_of(rows)] if rows else ()
+    return _post_items(rows, _subposts_by_post(subpost_rows))
+
+
+@section("serializer")
+def serialize_subposts(rows):
+    """Представление под-постов как у SubPostDetailSerializer(many=True).data"""
+    return [
+        {
+            "id": row["id"],
+            "title": row["title"],
+            "body": row["body"],
+            "post": row["post_id"],
+            "created_at": _datetime(row["created_at"]),
+            "updated_at": _datetime(row["updated_at"]),
+        }
+        for row in rows
+    ]
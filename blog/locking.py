@@ -0,0 +1,51 @@
+"""Ограниченные повторы записи при блокировке SQLite.
+
+SQLite допускает одного писателя. Если блокировка не освободилась за
+``busy_timeout`` (или читающая транзакция не может стать пишущей), запрос
+завершается ``OperationalError: database is locked``. ``retry_on_lock``
+повторяет такую операцию целиком не более ``BLOG_DB_LOCK_RETRIES`` раз с
+экспоненциальной задержкой. Внутри внешней транзакции повтор бессмысленен —
+ошибка пробрасывается сразу.
+"""
+
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+
+LOCK_MESSAGES = ("database is locked", "database table is locked")
+
+
+def is_lock_error(exc):
+    return isinstance(exc, OperationalError) and any(
+        message in str(exc) for message in LOCK_MESSAGES
+    )
+
+
+def retry_on_lock(func=None, *, using=DEFAULT_DB_ALIAS):
+    """Декоратор: повторить функцию при ошибке блокировки SQLite"""
+    if func is None:
+        return lambda func: retry_on_lock(func, using=using)
+
+    @wraps(func)
+    def wrapped(*args, **kwargs):
+        retries = getattr(settings, "BLOG_DB_LOCK_RETRIES", 3)
+        backoff = getattr(settings, "BLOG_DB_LOCK_BACKOFF", 0.05)
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if (
+                    attempt >= retries
+                    or not is_lock_error(exc)
+                    or transaction.get_connection(using).in_atomic_block
+                ):
+                    raise
+            # Случайный множитель разводит повторы конкурирующих писателей
+            time.sleep(backoff * 2**attempt * random.uniform(0.5, 1.5))
+            attempt += 1
+
+    return wrapped
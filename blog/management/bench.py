@@ -0,0 +1,19 @@
+"""Общие помощники команд-бенчмарков из ``blog/management/commands``."""
+
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+@contextmanager
+def rolled_back(using=DEFAULT_DB_ALIAS):
+    """Транзакция бенчмарка, которая всегда откатывается, чтобы не оставлять данные в БД"""
+    with transaction.atomic(using=using):
+        yield
+        transaction.set_rollback(True, using=using)
+
+
+def percentile(sorted_values, percent):
+    """Процентиль отсортированных значений методом ближайшего ранга"""
+    index = max(0, -(-len(sorted_values) * percent // 100) - 1)
+    return sorted_values[int(index)]
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+
+from blog.management.bench import percentile
+from blog.models import Post, SubPost
+
+ENDPOINTS = {
+    "list": lambda post_id: "/api/posts/",
+    "detail": lambda post_id: f"/api/posts/{post_id}/",
+    "view": lambda post_id: f"/api/posts/{post_id}/view/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк конкурентных запросов: синхронные представления под WSGI "
+        "(поток на запрос) против async-представлений под ASGI"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=200, help="Количество постов")
+        parser.add_argument("--requests", type=int, default=400, help="Запросов на прогон")
+        parser.add_argument(
+            "--concurrency", default="1,10,50", help="Уровни конкурентности через запятую"
+        )
+        parser.add_argument(
+            "--endpoints",
+            default="list,detail",
+            help=(
+                f"Эндпойнты через запятую: {', '.join(ENDPOINTS)}; view пишет в БД "
+                "и на SQLite при высокой конкурентности упирается в блокировки"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options["concurrency"].split(",")]
+        except ValueError:
+            raise CommandError("--concurrency: ожидаются целые числа через запятую")
+        endpoints = options["endpoints"].split(",")
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Неизвестные эндпойнты: {', '.join(sorted(unknown))}")
+
+        # Данные фиксируются в БД: их должны видеть соединения других потоков
+        user = User.objects.create(username="bench_async")
+        try:
+            posts = Post.objects.bulk_create(
+                Post(title=f"Post {i}", body=f"Content {i} " * 20, author=user)
+                for i in range(options["posts"])
+            )
+            post_ids = list(
+                Post.objects.filter(author=user).order_by("pk").values_list("pk", flat=True)
+            )
+            SubPost.objects.bulk_create(
+                SubPost(post_id=post_id, title="Sub", body="Sub content") for post_id in post_ids
+            )
+
+            self.stdout.write(
+                f"{connections['default'].vendor}: {len(posts)} постов, "
+                f"{options['requests']} запросов на прогон"
+            )
+            self.stdout.write(
+                f"  {'endpoint':8} {'server':5} {'conc':>5} {'req/s':>9} "
+                f"{'p50 ms':>9} {'p95 ms':>9} {'errors':>7}"
+            )
+            for endpoint in endpoints:
+                paths = [
+                    ENDPOINTS[endpoint](post_ids[i % len(post_ids)])
+                    for i in range(options["requests"])
+                ]
+                for level in levels:
+                    for server, run in (("wsgi", self._run_wsgi), ("asgi", self._run_asgi)):
+                        elapsed, latencies, errors = run(paths, level)
+                        latencies.sort()
+                        self.stdout.write(
+                            f"  {endpoint:8} {server:5} {level:5} {len(paths) / elapsed:9.1f} "
+                            f"{percentile(latencies, 50) * 1000:9.2f} "
+                            f"{percentile(latencies, 95) * 1000:9.2f} {errors:7}"
+                        )
+        finally:
+            user.delete()
+
+    def _run_wsgi(self, paths, concurrency):
+        """Синхронные DRF-представления, по потоку на одновременный запрос"""
+        latencies, errors = [], []
+        queue = iter(paths)
+        lock = threading.Lock()
+
+        def worker():
+            client = Client(raise_request_exception=False)
+            try:
+                while True:
+                    with lock:
+                        path = next(queue, None)
+                    if path is None:
+                        return
+                    started = time.perf_counter()
+                    response = client.get(path)
+                    latencies.append(time.perf_counter() - started)
+                    errors.append(response.status_code >= 500)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started, latencies, sum(errors)
+
+    def _run_asgi(self, paths, concurrency):
+        """Async-представления в одном цикле событий"""
+        latencies, errors = [], []
+        queue = iter(paths)
+
+        async def worker():
+            client = AsyncClient(raise_request_exception=False)
+            for path in queue:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                errors.append(response.status_code >= 500)
+
+        async def run():
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+        # AsyncClient создает ASGIRequest: маршруты из BLOG_ASGI_URLCONF
+        started = time.perf_counter()
+        asyncio.run(run())
+        return time.perf_counter() - started, latencies, sum(errors)
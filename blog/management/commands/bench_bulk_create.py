@@ -0,0 +1,65 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from blog.management.bench import rolled_back
+from blog.models import Post, SubPost
+from blog.serializers import PostCreateManySerializer
+
+
+class Command(BaseCommand):
+    help = "Бенчмарк массового создания постов: построчные INSERT против bulk_create"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=500, help="Количество постов")
+        parser.add_argument("--subposts", type=int, default=5, help="Количество под-постов на пост")
+        parser.add_argument("--batch-size", type=int, default=500, help="Размер пакета")
+        parser.add_argument("--repeat", type=int, default=3, help="Количество повторов")
+
+    def handle(self, *args, **options):
+        rows = options["posts"] * (1 + options["subposts"])
+        self.stdout.write(
+            f"{connection.vendor}: {options['posts']} постов x {options['subposts']} "
+            f"под-постов = {rows} строк, повторов: {options['repeat']}"
+        )
+
+        for name, insert in (("per-row", self._insert_per_row), ("bulk", self._insert_bulk)):
+            best = min(self._run(insert, options) for _ in range(options["repeat"]))
+            self.stdout.write(f"  {name:8} {best:8.3f} s  {rows / best:12.0f} rows/s")
+
+    def _run(self, insert, options):
+        """Выполнить вставку в транзакции и откатить её, вернуть время в секундах"""
+        with rolled_back():
+            user = User.objects.create(username="bench_bulk_create")
+            posts_data = [
+                {
+                    "title": f"Post {i}",
+                    "body": f"Content {i}",
+                    "author": user,
+                    "subposts": [
+                        {"title": f"Sub {i}.{j}", "body": f"Sub content {i}.{j}"}
+                        for j in range(options["subposts"])
+                    ],
+                }
+                for i in range(options["posts"])
+            ]
+            started = time.perf_counter()
+            insert(posts_data, options["batch_size"])
+            elapsed = time.perf_counter() - started
+        return elapsed
+
+    def _insert_per_row(self, posts_data, batch_size):
+        """Прежняя реализация: по одному INSERT на каждую строку"""
+        with transaction.atomic():
+            for post_data in posts_data:
+                subposts_data = post_data.pop("subposts", [])
+                post = Post.objects.create(**post_data)
+                for subpost_data in subposts_data:
+                    SubPost.objects.create(post=post, **subpost_data)
+
+    def _insert_bulk(self, posts_data, batch_size):
+        """Текущая реализация PostCreateManySerializer.create"""
+        serializer = PostCreateManySerializer(context={"batch_size": batch_size})
+        serializer.create({"posts": posts_data})
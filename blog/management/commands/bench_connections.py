@@ -0,0 +1,83 @@
+import copy
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк установки соединения с БД на запрос: новое соединение, "
+        "постоянное (CONN_MAX_AGE) и пул psycopg"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Количество запросов")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Алиас БД")
+
+    def handle(self, *args, **options):
+        base = connections[options["database"]].settings_dict
+        self.stdout.write(f"{base['ENGINE']}: {options['requests']} запросов на режим")
+
+        modes = [
+            ("per-request", {"CONN_MAX_AGE": 0}, {}),
+            ("persistent", {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True}, {}),
+        ]
+        if base["ENGINE"] == "django.db.backends.postgresql":
+            try:
+                import psycopg_pool  # noqa: F401
+            except ImportError:
+                self.stdout.write("  pool: пропущен, psycopg_pool не установлен")
+            else:
+                modes.append(("pool", {"CONN_MAX_AGE": 0}, {"pool": {"min_size": 1}}))
+
+        for name, overrides, options_overrides in modes:
+            settings_dict = copy.deepcopy(base)
+            settings_dict.update(overrides)
+            settings_dict["OPTIONS"] = {
+                key: value for key, value in settings_dict["OPTIONS"].items() if key != "pool"
+            }
+            settings_dict["OPTIONS"].update(options_overrides)
+            connects, setup, total = self._run(settings_dict, options)
+            count = options["requests"]
+            self.stdout.write(
+                f"  {name:12} {connects:6} соединений  "
+                f"setup {setup / count * 1000:8.3f} ms/запрос  "
+                f"всего {total / count * 1000:8.3f} ms/запрос"
+            )
+
+    def _run(self, settings_dict, options):
+        """Повторить жизненный цикл запроса Django на отдельном подключении"""
+        backend = load_backend(settings_dict["ENGINE"])
+        wrapper = backend.DatabaseWrapper(settings_dict, options["database"])
+
+        connects, setup = 0, 0.0
+        connect = wrapper.connect
+
+        def timed_connect():
+            nonlocal connects, setup
+            started = time.perf_counter()
+            try:
+                connect()
+            finally:
+                setup += time.perf_counter() - started
+                connects += 1
+
+        wrapper.connect = timed_connect
+
+        started = time.perf_counter()
+        try:
+            for _ in range(options["requests"]):
+                # То же, что делают обработчики сигналов request_started / request_finished
+                wrapper.close_if_unusable_or_obsolete()
+                with wrapper.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                wrapper.close_if_unusable_or_obsolete()
+        finally:
+            total = time.perf_counter() - started
+            wrapper.close()
+            if getattr(wrapper, "pool", None) is not None:
+                wrapper.close_pool()
+        return connects, setup, total
@@ -0,0 +1,65 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.fast_serialization import post_values, serialize_posts
+from blog.management.bench import rolled_back
+from blog.models import Post, SubPost
+from blog.serializers import PostSerializer
+
+
+class Command(BaseCommand):
+    help = "Бенчмарк сериализации списка постов: PostSerializer против быстрого пути"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100, help="Постов на странице")
+        parser.add_argument("--subposts", type=int, default=3, help="Под-постов на пост")
+        parser.add_argument("--repeat", type=int, default=50, help="Количество повторов")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = self._seed(options["posts"], options["subposts"])
+            self._bench(user, options["posts"], options["repeat"])
+
+    def _seed(self, posts_count, subposts_count):
+        user = User.objects.create(username="bench_serialization", email="bench@example.com")
+        posts = Post.objects.bulk_create(
+            Post(title=f"Post {i}", body=f"Content {i} " * 20, author=user)
+            for i in range(posts_count)
+        )
+        SubPost.objects.bulk_create(
+            SubPost(title=f"Sub {j}", body=f"Sub content {j} " * 10, post=post)
+            for post in posts
+            for j in range(subposts_count)
+        )
+        return user
+
+    def _bench(self, user, posts_count, repeat):
+        # Тот же queryset, что строит PostListCreateView: автор одним JOIN, liked_by_me
+        # подзапросом, иначе сравнение измеряет N+1 запрос автора, а не сериализацию
+        queryset = (
+            Post.objects.select_related("author")
+            .with_liked_by_me(user)
+            .order_by("-created_at")[:posts_count]
+        )
+        cases = (
+            (
+                "PostSerializer",
+                lambda: PostSerializer(queryset.prefetch_related("subposts"), many=True).data,
+            ),
+            ("fast path", lambda: serialize_posts(post_values(queryset))),
+        )
+        for name, serialize in cases:
+            with CaptureQueriesContext(connection) as queries:
+                serialize()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                serialize()
+            elapsed = time.perf_counter() - started
+            rate = posts_count * repeat / elapsed
+            self.stdout.write(
+                f"  {name:15} {elapsed:8.3f} s  {rate:12.0f} posts/s  {len(queries):3} queries"
+            )
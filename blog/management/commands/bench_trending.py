@@ -0,0 +1,107 @@
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog import trending
+from blog.management.bench import rolled_back
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк GET /api/posts/trending/ при росте таблицы постов: чтение страницы "
+        "по индексу рейтинга против сортировки всех постов по счетчикам"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="1000,10000,50000", help="Размеры таблицы постов через запятую"
+        )
+        parser.add_argument("--requests", type=int, default=50, help="Запросов на размер")
+        parser.add_argument("--page-size", type=int, default=20, help="Размер страницы")
+        parser.add_argument("--seed", type=int, default=42, help="Зерно генератора данных")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options["sizes"].split(","))
+        except ValueError:
+            raise CommandError("--sizes: ожидаются целые числа через запятую")
+        if options["requests"] < 1:
+            raise CommandError("--requests должен быть положительным")
+
+        self.stdout.write(
+            f"{connection.vendor}: {options['requests']} запросов, страница {options['page_size']}"
+        )
+        self.stdout.write(f"  {'posts':>8} {'trending ms':>12} {'queries':>8} {'full sort ms':>13}")
+        rng = random.Random(options["seed"])
+        with rolled_back():
+            user = User.objects.create(username="bench_trending", password="!")
+            created = 0
+            for size in sizes:
+                self._grow(user, rng, created, size)
+                created = size
+                endpoint, queries = self._time_endpoint(options)
+                full_sort = self._time_full_sort(options)
+                self.stdout.write(
+                    f"  {size:8} {endpoint * 1000:12.3f} {queries:8.1f} {full_sort * 1000:13.3f}"
+                )
+
+    def _grow(self, user, rng, start, size):
+        """Добавить посты до нужного размера и их рейтинг пакетными INSERT"""
+        Post.objects.bulk_create(
+            (
+                Post(
+                    title=f"Post {i}",
+                    body="Body",
+                    author=user,
+                    likes_count=rng.randrange(50),
+                    views_count=rng.randrange(1000),
+                )
+                for i in range(start, size)
+            ),
+            batch_size=1000,
+        )
+        ids = list(Post.objects.filter(author=user).order_by("pk").values_list("pk", flat=True))
+        for offset in range(start, len(ids), 1000):
+            trending.refresh_scores(ids[offset : offset + 1000])
+
+    def _time_endpoint(self, options):
+        """Медиана времени ответа эндпойнта и запросов к БД на запрос"""
+        client = APIClient()
+        url = reverse("post-trending")
+        latencies, queries = [], 0
+        for _ in range(options["requests"]):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url, {"page_size": options["page_size"]})
+                latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f"trending: HTTP {response.status_code}")
+            queries += len(captured)
+        latencies.sort()
+        return latencies[len(latencies) // 2], queries / options["requests"]
+
+    def _time_full_sort(self, options):
+        """Медиана времени выборки той же страницы сортировкой всей таблицы постов"""
+        like_weight = getattr(settings, "BLOG_TRENDING_LIKE_WEIGHT", 10)
+        view_weight = getattr(settings, "BLOG_TRENDING_VIEW_WEIGHT", 1)
+        points = F("likes_count") * like_weight + F("views_count") * view_weight
+        latencies = []
+        for _ in range(options["requests"]):
+            started = time.perf_counter()
+            list(
+                Post.objects.annotate(points=points)
+                .order_by("-points", "-id")
+                .values_list("pk", flat=True)[: options["page_size"]]
+            )
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+        return latencies[len(latencies) // 2]
@@ -0,0 +1,372 @@
+import json
+import platform
+import random
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from blog import api_urls, author_stats, trending
+from blog.management.bench import percentile, rolled_back
+from blog.models import Like, Post, SubPost
+
+WORDS = (
+    "django python api blog post cache query index search like view author "
+    "stream cursor page batch server client model field"
+).split()
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк всех эндпойнтов blog/api_urls.py на детерминированных данных: "
+        "p50/p95/p99, запросы к БД и пропускная способность в JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20, help="Количество пользователей")
+        parser.add_argument("--posts", type=int, default=1000, help="Количество постов")
+        parser.add_argument("--subposts", type=int, default=3, help="Под-постов на пост")
+        parser.add_argument("--likes", type=int, default=5, help="Лайков на пост")
+        parser.add_argument("--requests", type=int, default=100, help="Запросов на сценарий")
+        parser.add_argument("--warmup", type=int, default=5, help="Прогревочных запросов")
+        parser.add_argument("--seed", type=int, default=42, help="Зерно генератора данных")
+        parser.add_argument(
+            "--only", action="append", default=[], help="Запустить только указанные сценарии"
+        )
+        parser.add_argument("--output", help="Записать JSON в файл вместо stdout")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests должен быть положительным")
+        if options["likes"] > options["users"]:
+            raise CommandError("--likes не может превышать --users")
+
+        self.rng = random.Random(options["seed"])
+        scenarios = self._scenarios(options)
+        self._check_coverage(scenarios)
+        if options["only"]:
+            unknown = set(options["only"]) - {label for label, *_ in scenarios}
+            if unknown:
+                raise CommandError(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in scenarios if scenario[0] in options["only"]]
+
+        with rolled_back():
+            self._seed(options)
+            results = [self._run(scenario, options) for scenario in scenarios]
+
+        report = {
+            "meta": {
+                "vendor": connection.vendor,
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                **{
+                    name: options[name]
+                    for name in ("users", "posts", "subposts", "likes", "requests", "seed")
+                },
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output + "\n")
+            self.stderr.write(f"Результаты записаны в {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def _seed(self, options):
+        """Создать пользователей, посты, под-посты и лайки пакетными INSERT"""
+        rng, batch_size = self.rng, settings.BLOG_BULK_CREATE_BATCH_SIZE
+
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f"bench_{i}",
+                    email=f"bench_{i}@example.com",
+                    password="!",
+                    is_staff=i == 0,
+                )
+                for i in range(options["users"])
+            ),
+            batch_size=batch_size,
+        )
+        self.users = list(User.objects.filter(username__startswith="bench_").order_by("pk"))
+
+        likers = [rng.sample(self.users, options["likes"]) for _ in range(options["posts"])]
+        Post.objects.bulk_create(
+            (
+                Post(
+                    title=_text(rng, 4),
+                    body=_text(rng, 60),
+                    author=rng.choice(self.users),
+                    views_count=rng.randrange(1000),
+                    likes_count=len(likers[i]),
+                )
+                for i in range(options["posts"])
+            ),
+            batch_size=batch_size,
+        )
+        self.post_ids = list(Post.objects.order_by("pk").values_list("pk", flat=True))
+        trending.refresh_scores(self.post_ids)
+        author_stats.rebuild(0, max(user.pk for user in self.users) + 1)
+
+        SubPost.objects.bulk_create(
+            (
+                SubPost(post_id=post_id, title=_text(rng, 3), body=_text(rng, 30))
+                for post_id in self.post_ids
+                for _ in range(options["subposts"])
+            ),
+            batch_size=batch_size,
+        )
+        self.subpost_ids = list(SubPost.objects.order_by("pk").values_list("pk", flat=True))
+
+        Like.objects.bulk_create(
+            (
+                Like(post_id=post_id, user=user)
+                for post_id, users in zip(self.post_ids, likers)
+                for user in users
+            ),
+            batch_size=batch_size,
+        )
+
+    def _scenarios(self, options):
+        """Сценарии: (название, имя маршрута, метод, подготовка, построитель запроса)"""
+        rng = self.rng
+        pages = max(1, options["posts"] // 20)
+
+        def post_id(i):
+            return rng.choice(self.post_ids)
+
+        def subpost_id(i):
+            return rng.choice(self.subpost_ids)
+
+        def new_post(i):
+            return {"title": _text(rng, 4), "body": _text(rng, 60), "subposts": []}
+
+        def victims(model, ids_attr, per_request=1):
+            """Отдельные объекты для DELETE, чтобы не удалять общие данные"""
+
+            def prepare(count):
+                if model is Post:
+                    objects = (
+                        Post(title="victim", body="victim", author=self.users[0])
+                        for _ in range(count * per_request)
+                    )
+                else:
+                    objects = (
+                        SubPost(post_id=self.post_ids[0], title="victim", body="victim")
+                        for _ in range(count)
+                    )
+                model.objects.bulk_create(objects)
+                ids = model.objects.filter(title="victim").order_by("pk")
+                setattr(self, ids_attr, list(ids.values_list("pk", flat=True)))
+
+            return prepare
+
+        return [
+            (
+                "post-list",
+                "post-list-create",
+                "get",
+                None,
+                lambda i: (None, {"page": i % pages + 1}),
+            ),
+            (
+                "post-list-cursor",
+                "post-list-create",
+                "get",
+                None,
+                lambda i: (None, {"pagination": "cursor"}),
+            ),
+            ("post-create", "post-list-create", "post", None, lambda i: (None, new_post(i))),
+            ("post-detail", "post-detail", "get", None, lambda i: (post_id(i), None)),
+            (
+                "post-update",
+                "post-detail",
+                "patch",
+                None,
+                lambda i: (post_id(i), {"title": _text(rng, 4)}),
+            ),
+            (
+                "post-delete",
+                "post-detail",
+                "delete",
+                victims(Post, "post_victims"),
+                lambda i: (self.post_victims[i], None),
+            ),
+            (
+                "post-bulk-create",
+                "post-bulk-create",
+                "post",
+                None,
+                lambda i: (None, {"posts": [new_post(i) for _ in range(10)]}),
+            ),
+            (
+                "post-bulk-update",
+                "post-bulk-create",
+                "patch",
+                victims(Post, "bulk_update_victims", per_request=10),
+                lambda i: (
+                    None,
+                    {
+                        "ids": self.bulk_update_victims[i * 10 : (i + 1) * 10],
+                        "values": {"title": _text(rng, 4)},
+                    },
+                ),
+            ),
+            (
+                "post-bulk-delete",
+                "post-bulk-create",
+                "delete",
+                victims(Post, "bulk_delete_victims", per_request=10),
+                lambda i: (None, {"ids": self.bulk_delete_victims[i * 10 : (i + 1) * 10]}),
+            ),
+            (
+                "post-like-state",
+                "post-like-state",
+                "get",
+                None,
+                lambda i: (
+                    None,
+                    {
+                        "ids": ",".join(
+                            map(str, rng.sample(self.post_ids, min(20, len(self.post_ids))))
+                        )
+                    },
+                ),
+            ),
+            (
+                "post-trending",
+                "post-trending",
+                "get",
+                None,
+                lambda i: (None, {"page_size": 20}),
+            ),
+            (
+                "post-search",
+                "post-search",
+                "get",
+                None,
+                lambda i: (None, {"q": rng.choice(WORDS)}),
+            ),
+            (
+                "post-export",
+                "post-export",
+                "get",
+                None,
+                lambda i: (None, {"output": ("ndjson", "csv")[i % 2]}),
+            ),
+            ("post-like", "post-like", "post", None, lambda i: (post_id(i), None)),
+            ("post-view", "post-view", "get", None, lambda i: (post_id(i), None)),
+            (
+                "subpost-list",
+                "subpost-list-create",
+                "get",
+                None,
+                lambda i: (None, {"page": i % pages + 1}),
+            ),
+            (
+                "subpost-create",
+                "subpost-list-create",
+                "post",
+                None,
+                lambda i: (
+                    None,
+                    {"post": post_id(i), "title": _text(rng, 3), "body": _text(rng, 30)},
+                ),
+            ),
+            ("subpost-detail", "subpost-detail", "get", None, lambda i: (subpost_id(i), None)),
+            (
+                "subpost-update",
+                "subpost-detail",
+                "patch",
+                None,
+                lambda i: (subpost_id(i), {"title": _text(rng, 3)}),
+            ),
+            (
+                "subpost-delete",
+                "subpost-detail",
+                "delete",
+                victims(SubPost, "subpost_victims"),
+                lambda i: (self.subpost_victims[i], None),
+            ),
+            (
+                "author-stats",
+                "author-stats",
+                "get",
+                None,
+                lambda i: (rng.choice(self.users).pk, None),
+            ),
+            (
+                "response-cache-stats",
+                "response-cache-stats",
+                "get",
+                None,
+                lambda i: (None, None),
+            ),
+        ]
+
+    def _check_coverage(self, scenarios):
+        """Каждый маршрут blog/api_urls.py должен иметь хотя бы один сценарий"""
+        covered = {route for _, route, *_ in scenarios}
+        missing = {pattern.name for pattern in api_urls.urlpatterns} - covered
+        if missing:
+            raise CommandError(f"Нет сценариев для маршрутов: {', '.join(sorted(missing))}")
+
+    def _run(self, scenario, options):
+        label, route, method, prepare, build = scenario
+        warmup, count = options["warmup"], options["requests"]
+        if prepare:
+            prepare(warmup + count)
+
+        client = APIClient()
+        client.force_authenticate(user=self.users[0])
+        send = getattr(client, method)
+
+        def request(i):
+            arg, data = build(i)
+            url = reverse(route) if arg is None else reverse(route, args=[arg])
+            if method == "get":
+                return send(url, data)
+            return send(url, data, format="json")
+
+        for i in range(warmup):
+            request(count + i)
+
+        latencies, queries, errors = [], 0, 0
+        started = time.perf_counter()
+        for i in range(count):
+            with CaptureQueriesContext(connection) as captured:
+                request_started = time.perf_counter()
+                response = request(i)
+                if response.streaming:
+                    # Потоковый ответ выполняет запросы к БД при чтении тела
+                    b"".join(response.streaming_content)
+                latencies.append(time.perf_counter() - request_started)
+            queries += len(captured)
+            errors += response.status_code >= 400
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "scenario": label,
+            "route": route,
+            "method": method.upper(),
+            "requests": count,
+            "errors": errors,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "queries_per_request": round(queries / count, 2),
+            "throughput_rps": round(count / elapsed, 1),
+        }
@@ -0,0 +1,51 @@
+import pstats
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.profiling import PROFILE_SUFFIXES, get_profile_dir
+
+
+class Command(BaseCommand):
+    help = "Список профилей запросов из BLOG_PROFILER_DIR и сводка по выбранному профилю"
+
+    def add_arguments(self, parser):
+        parser.add_argument("profile", nargs="?", help="Имя файла .prof для сводки")
+        parser.add_argument(
+            "--sort",
+            default="cumulative",
+            choices=["cumulative", "tottime", "ncalls"],
+            help="Сортировка функций в сводке",
+        )
+        parser.add_argument("--limit", type=int, default=20, help="Количество строк")
+
+    def handle(self, *args, **options):
+        directory = get_profile_dir()
+        if options["profile"]:
+            self._summarize(directory / options["profile"], options)
+            return
+
+        profiles = sorted(
+            (path for path in directory.glob("*") if path.name.endswith(PROFILE_SUFFIXES)),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        if not profiles:
+            self.stdout.write(f"Профилей нет в {directory}")
+            return
+        for path in profiles[: options["limit"]]:
+            stat = path.stat()
+            modified = datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+            self.stdout.write(f"{modified}  {stat.st_size / 1024:8.1f} KiB  {path.name}")
+
+    def _summarize(self, path, options):
+        if not path.is_file():
+            raise CommandError(f"Профиль не найден: {path}")
+        if path.suffix != ".prof":
+            raise CommandError("Сводка доступна только для .prof; откройте файл в speedscope")
+
+        stats = pstats.Stats(str(path), stream=self.stdout)
+        self.stdout.write(
+            f"{path.name}: {stats.total_calls} вызовов, {stats.total_tt * 1000:.1f} ms"
+        )
+        stats.strip_dirs().sort_stats(options["sort"]).print_stats(options["limit"])
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from blog import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковая выгрузка всех постов с под-постами и счетчиками лайков "
+        "в NDJSON или CSV с ограниченным потреблением памяти"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=list(export.FORMATS), default="ndjson", help="Формат выгрузки"
+        )
+        parser.add_argument("--output", help="Файл выгрузки (по умолчанию stdout)")
+        parser.add_argument(
+            "--chunk-size", type=int, help="Строк в одной порции чтения (BLOG_STREAM_CHUNK_SIZE)"
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Алиас БД")
+
+    def handle(self, *args, **options):
+        lines = export.export_lines(
+            options["format"], chunk_size=options["chunk_size"], using=options["database"]
+        )
+        started = time.perf_counter()
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as file:
+                count = self._write(lines, file.write)
+        else:
+            count = self._write(lines, lambda line: self.stdout.write(line, ending=""))
+
+        elapsed = time.perf_counter() - started
+        if options["format"] == "csv":
+            count -= 1  # строка заголовка
+        self.stderr.write(
+            f"Выгружено {count} постов за {elapsed:.2f} с ({count / max(elapsed, 1e-6):.0f} постов/с)"
+        )
+
+    def _write(self, lines, write):
+        count = 0
+        for line in lines:
+            write(line)
+            count += 1
+        return count
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from blog.view_buffer import get_view_buffer
+
+
+class Command(BaseCommand):
+    help = "Сбросить буферизованные просмотры постов в БД"
+
+    def handle(self, *args, **options):
+        flushed = get_view_buffer().flush()
+        self.stdout.write(self.style.SUCCESS(f"Записано просмотров: {flushed}"))
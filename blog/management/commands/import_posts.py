@@ -0,0 +1,264 @@
+import csv
+import io
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from blog import author_stats, response_cache
+from blog.models import ImportCheckpoint, Post
+
+TITLE_MAX_LENGTH = Post._meta.get_field("title").max_length
+
+
+class InvalidRecord(ValueError):
+    """Запись JSONL не прошла проверку"""
+
+
+def _text(record, name, max_length=None):
+    value = record.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise InvalidRecord(f"поле {name}: ожидается непустая строка")
+    if max_length and len(value) > max_length:
+        raise InvalidRecord(f"поле {name}: не более {max_length} символов")
+    return value
+
+
+def parse_record(raw):
+    """Проверить запись без DRF-сериализаторов: вернуть (title, body, author, subposts)"""
+    try:
+        record = json.loads(raw)
+    except ValueError as exc:
+        raise InvalidRecord(f"некорректный JSON: {exc}")
+    if not isinstance(record, dict):
+        raise InvalidRecord("ожидается JSON-объект")
+
+    author = record.get("author")
+    if author is not None and not isinstance(author, str):
+        raise InvalidRecord("поле author: ожидается имя пользователя")
+
+    subposts = record.get("subposts", [])
+    if not isinstance(subposts, list) or not all(isinstance(sub, dict) for sub in subposts):
+        raise InvalidRecord("поле subposts: ожидается список объектов")
+
+    return (
+        _text(record, "title", TITLE_MAX_LENGTH),
+        _text(record, "body"),
+        author,
+        [(_text(sub, "title", TITLE_MAX_LENGTH), _text(sub, "body")) for sub in subposts],
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковый импорт постов с под-постами из JSONL-файла пакетами "
+        "(COPY на PostgreSQL, executemany на SQLite) с продолжением после сбоя"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSONL-файл: по одному посту на строку")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "BLOG_BULK_CREATE_BATCH_SIZE", 500),
+            help="Постов в одной транзакции",
+        )
+        parser.add_argument("--author", help="Автор для записей без поля author")
+        parser.add_argument(
+            "--skip-invalid", action="store_true", help="Пропускать некорректные записи"
+        )
+        parser.add_argument(
+            "--restart", action="store_true", help="Начать с начала, забыв сохраненную позицию"
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"]).resolve()
+        if not path.is_file():
+            raise CommandError(f"Файл не найден: {path}")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть положительным")
+        if connection.vendor not in ("sqlite", "postgresql"):
+            raise CommandError(f"Импорт не поддерживается для {connection.vendor}")
+
+        if connection.vendor == "postgresql":
+            self.insert_posts, self.insert_subposts = self._copy_posts, self._copy_subposts
+        else:
+            self.insert_posts = self._executemany_posts
+            self.insert_subposts = self._executemany_subposts
+
+        self.authors = {}
+        self.default_author = options["author"]
+        if self.default_author is not None:
+            self._resolve_authors({self.default_author})
+            if self.default_author not in self.authors:
+                raise CommandError(f"Пользователь не найден: {self.default_author}")
+
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=str(path))
+        if options["restart"]:
+            checkpoint.offset = checkpoint.line = 0
+            checkpoint.posts = checkpoint.subposts = checkpoint.skipped = 0
+            checkpoint.save()
+        elif checkpoint.line:
+            self.stdout.write(f"Продолжаем со строки {checkpoint.line + 1}")
+
+        started = time.perf_counter()
+        imported = 0
+        with path.open("rb") as file:
+            file.seek(checkpoint.offset)
+            for batch, offset, line, skipped in self._batches(file, checkpoint, options):
+                imported += self._import_batch(batch, checkpoint, offset, line, skipped)
+                rate = imported / (time.perf_counter() - started)
+                self.stdout.write(
+                    f"  строка {checkpoint.line}: {checkpoint.posts} постов, "
+                    f"{checkpoint.subposts} под-постов, {rate:.0f} постов/с"
+                )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Импортировано {imported} постов за {elapsed:.2f} с; всего по файлу: "
+                f"{checkpoint.posts} постов, {checkpoint.subposts} под-постов, "
+                f"пропущено {checkpoint.skipped}"
+            )
+        )
+
+    def _batches(self, file, checkpoint, options):
+        """Пакеты проверенных записей и позиция в файле после каждого пакета"""
+        offset, line, skipped = checkpoint.offset, checkpoint.line, 0
+        batch = []
+        for raw in file:
+            offset += len(raw)
+            line += 1
+            if not raw.strip():
+                continue
+            try:
+                title, body, author, subposts = parse_record(raw)
+                author = author if author is not None else self.default_author
+                if author is None:
+                    raise InvalidRecord("не указан author, а --author не задан")
+            except InvalidRecord as exc:
+                if not options["skip_invalid"]:
+                    raise CommandError(
+                        f"Строка {line}: {exc}. Загруженные пакеты сохранены, повторный "
+                        f"запуск продолжит со строки {checkpoint.line + 1}"
+                    )
+                self.stderr.write(f"Строка {line} пропущена: {exc}")
+                skipped += 1
+                continue
+
+            batch.append((title, body, author, subposts, line))
+            if len(batch) >= options["batch_size"]:
+                yield batch, offset, line, skipped
+                batch, skipped = [], 0
+        if batch or skipped:
+            yield batch, offset, line, skipped
+
+    def _resolve_authors(self, usernames):
+        missing = usernames - self.authors.keys()
+        if missing:
+            self.authors.update(
+                User.objects.filter(username__in=missing).values_list("username", "pk")
+            )
+
+    def _import_batch(self, batch, checkpoint, offset, line, skipped):
+        """Вставить пакет и сдвинуть позицию импорта одной транзакцией"""
+        self._resolve_authors({author for _, _, author, _, _ in batch})
+        for _, _, author, _, record_line in batch:
+            if author not in self.authors:
+                raise CommandError(f"Строка {record_line}: пользователь не найден: {author}")
+
+        now = timezone.now()
+        if connection.vendor == "sqlite":
+            now = connection.ops.adapt_datetimefield_value(now)
+        posts = [
+            (title, body, self.authors[author], now, now, 0, 0)
+            for title, body, author, _, _ in batch
+        ]
+        with transaction.atomic():
+            if batch:
+                post_ids = self.insert_posts(posts)
+                subposts = [
+                    (title, body, post_id, now, now)
+                    for post_id, (_, _, _, post_subposts, _) in zip(post_ids, batch)
+                    for title, body in post_subposts
+                ]
+                self.insert_subposts(subposts)
+                for author, count in Counter(author for _, _, author, _, _ in batch).items():
+                    author_stats.add_author_deltas(self.authors[author], posts=count)
+                checkpoint.posts += len(posts)
+                checkpoint.subposts += len(subposts)
+                response_cache.bump_posts()
+
+            checkpoint.offset, checkpoint.line = offset, line
+            checkpoint.skipped += skipped
+            checkpoint.save()
+        return len(posts)
+
+    # SQLite: executemany и последовательные rowid внутри транзакции записи
+
+    def _executemany_posts(self, posts):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO blog_post (title, body, author_id, created_at, updated_at, "
+                "views_count, likes_count) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                posts,
+            )
+            # Транзакция держит блокировку записи, поэтому id пакета идут подряд
+            cursor.execute("SELECT last_insert_rowid()")
+            last_id = cursor.fetchone()[0]
+        return range(last_id - len(posts) + 1, last_id + 1)
+
+    def _executemany_subposts(self, subposts):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO blog_subpost (title, body, post_id, created_at, updated_at) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                subposts,
+            )
+
+    # PostgreSQL: id резервируются из последовательности, строки загружаются через COPY
+
+    def _copy_posts(self, posts):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence('blog_post', 'id')) "
+                "FROM generate_series(1, %s)",
+                [len(posts)],
+            )
+            post_ids = [row[0] for row in cursor.fetchall()]
+            self._copy(
+                cursor,
+                "blog_post (id, title, body, author_id, created_at, updated_at, "
+                "views_count, likes_count)",
+                [(post_id, *post) for post_id, post in zip(post_ids, posts)],
+            )
+        return post_ids
+
+    def _copy_subposts(self, subposts):
+        with connection.cursor() as cursor:
+            self._copy(
+                cursor, "blog_subpost (title, body, post_id, created_at, updated_at)", subposts
+            )
+
+    def _copy(self, cursor, target, rows):
+        raw = cursor.cursor
+        if hasattr(raw, "copy"):
+            # psycopg 3
+            with raw.copy(f"COPY {target} FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+            return
+        # psycopg2
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            [value.isoformat() if hasattr(value, "isoformat") else value for value in row]
+            for row in rows
+        )
+        buffer.seek(0)
+        raw.copy_expert(f"COPY {target} FROM STDIN WITH (FORMAT csv)", buffer)
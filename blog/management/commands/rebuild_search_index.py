@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from blog import search
+
+
+class Command(BaseCommand):
+    help = "Пересоздать полнотекстовый индекс постов и под-постов"
+
+    def handle(self, *args, **options):
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Поисковый индекс пересоздан ({connection.vendor})"))
@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from blog import author_stats
+
+
+class Command(BaseCommand):
+    help = "Пересчитать статистику авторов по их постам и исправить расхождения"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Количество авторов в одном проходе"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Только показать количество расхождений"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_pk = User.objects.aggregate(last=Max("pk"))["last"] or 0
+        repaired = 0
+        # Диапазоны первичных ключей пользователей: агрегат, чтение и upsert на проход
+        for start in range(0, last_pk + 1, batch_size):
+            with transaction.atomic():
+                repaired += author_stats.rebuild(
+                    start, start + batch_size, dry_run=options["dry_run"]
+                )
+
+        verb = "Найдено" if options["dry_run"] else "Исправлено"
+        self.stdout.write(self.style.SUCCESS(f"{verb} строк статистики авторов: {repaired}"))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Like, Post
+
+
+class Command(BaseCommand):
+    help = "Пересчитать денормализованные счетчики лайков постов и исправить расхождения"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Количество постов в одном UPDATE"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Только показать количество расхождений"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        actual = Coalesce(
+            Subquery(
+                Like.objects.filter(post=OuterRef("pk"))
+                .order_by()
+                .values("post")
+                .annotate(total=Count("pk"))
+                .values("total")
+            ),
+            0,
+        )
+
+        last_pk = Post.objects.aggregate(last=Max("pk"))["last"] or 0
+        repaired = 0
+        # Проходим таблицу диапазонами первичных ключей, обновляя только расходящиеся строки
+        for start in range(0, last_pk + 1, batch_size):
+            stale = Post.objects.filter(pk__gte=start, pk__lt=start + batch_size).exclude(
+                likes_count=actual
+            )
+            if options["dry_run"]:
+                repaired += stale.count()
+                continue
+            with transaction.atomic():
+                repaired += stale.update(likes_count=actual)
+
+        verb = "Найдено" if options["dry_run"] else "Исправлено"
+        self.stdout.write(self.style.SUCCESS(f"{verb} счетчиков лайков: {repaired}"))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from blog import trending
+from blog.models import Post, TrendingScore
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитать рейтинг популярных постов целиком (после смены весов или "
+        "BLOG_TRENDING_DECAY_SECONDS и для постов, созданных до появления рейтинга)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Количество постов в одном upsert"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_pk = Post.objects.aggregate(last=Max("pk"))["last"] or 0
+        scored = 0
+        # Диапазоны первичных ключей: каждая порция — один SELECT и один upsert
+        for start in range(0, last_pk + 1, batch_size):
+            batch = Post.objects.filter(pk__gte=start, pk__lt=start + batch_size)
+            with transaction.atomic():
+                # Посты без лайков и просмотров в рейтинг не входят
+                TrendingScore.objects.filter(
+                    post__in=batch.filter(likes_count=0, views_count=0)
+                ).delete()
+                active = batch.exclude(likes_count=0, views_count=0)
+                scored += trending.refresh_scores(active.values_list("pk", flat=True))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Рейтинг пересчитан: {scored} постов, строк в таблице: "
+                f"{TrendingScore.objects.count()}"
+            )
+        )
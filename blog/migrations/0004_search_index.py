@@ -0,0 +1,95 @@
+# Полнотекстовый индекс: FTS5 на SQLite, tsvector + GIN на PostgreSQL.
+# DDL скопирован из blog/search.py на момент миграции, чтобы последующие
+# изменения модуля не меняли то, что делает эта миграция.
+
+from django.db import migrations
+
+SQLITE_SCHEMA = [
+    # Посты
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts "
+    "USING fts5(title, body, content='blog_post', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_ai AFTER INSERT ON blog_post BEGIN "
+    "INSERT INTO blog_post_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_ad AFTER DELETE ON blog_post BEGIN "
+    "INSERT INTO blog_post_fts(blog_post_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_au AFTER UPDATE OF title, body ON blog_post BEGIN "
+    "INSERT INTO blog_post_fts(blog_post_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO blog_post_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    # Под-посты
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blog_subpost_fts "
+    "USING fts5(title, body, post_id UNINDEXED, content='blog_subpost', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS blog_subpost_fts_ai AFTER INSERT ON blog_subpost BEGIN "
+    "INSERT INTO blog_subpost_fts(rowid, title, body, post_id) "
+    "VALUES (new.id, new.title, new.body, new.post_id); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_subpost_fts_ad AFTER DELETE ON blog_subpost BEGIN "
+    "INSERT INTO blog_subpost_fts(blog_subpost_fts, rowid, title, body, post_id) "
+    "VALUES ('delete', old.id, old.title, old.body, old.post_id); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_subpost_fts_au "
+    "AFTER UPDATE OF title, body, post_id ON blog_subpost BEGIN "
+    "INSERT INTO blog_subpost_fts(blog_subpost_fts, rowid, title, body, post_id) "
+    "VALUES ('delete', old.id, old.title, old.body, old.post_id); "
+    "INSERT INTO blog_subpost_fts(rowid, title, body, post_id) "
+    "VALUES (new.id, new.title, new.body, new.post_id); END",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS blog_post_fts_ai",
+    "DROP TRIGGER IF EXISTS blog_post_fts_ad",
+    "DROP TRIGGER IF EXISTS blog_post_fts_au",
+    "DROP TRIGGER IF EXISTS blog_subpost_fts_ai",
+    "DROP TRIGGER IF EXISTS blog_subpost_fts_ad",
+    "DROP TRIGGER IF EXISTS blog_subpost_fts_au",
+    "DROP TABLE IF EXISTS blog_post_fts",
+    "DROP TABLE IF EXISTS blog_subpost_fts",
+]
+
+POSTGRES_SCHEMA = [
+    "ALTER TABLE blog_post ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(title, '') || ' ' || "
+    "coalesce(body, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS blog_post_search_idx ON blog_post USING GIN (search_vector)",
+    "ALTER TABLE blog_subpost ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(title, '') || ' ' || "
+    "coalesce(body, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS blog_subpost_search_idx ON blog_subpost USING GIN (search_vector)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS blog_post_search_idx",
+    "ALTER TABLE blog_post DROP COLUMN IF EXISTS search_vector",
+    "DROP INDEX IF EXISTS blog_subpost_search_idx",
+    "ALTER TABLE blog_subpost DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_REBUILD = [
+    "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')",
+    "INSERT INTO blog_subpost_fts(blog_subpost_fts) VALUES ('rebuild')",
+]
+
+
+def _execute(schema_editor, statements):
+    statements = statements.get(schema_editor.connection.vendor, [])
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    _execute(schema_editor, {'sqlite': SQLITE_SCHEMA + SQLITE_REBUILD, 'postgresql': POSTGRES_SCHEMA})
+
+
+def drop_search_index(apps, schema_editor):
+    _execute(schema_editor, {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_post_created_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:48
+
+import math
+from itertools import islice
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_trending_scores(apps, schema_editor):
+    """Рейтинг постов с лайками или просмотрами по формуле blog/trending.py,
+    чтобы лента не была пустой до первого refresh_trending"""
+    Post = apps.get_model('blog', 'Post')
+    TrendingScore = apps.get_model('blog', 'TrendingScore')
+    like_weight = getattr(settings, 'BLOG_TRENDING_LIKE_WEIGHT', 10)
+    view_weight = getattr(settings, 'BLOG_TRENDING_VIEW_WEIGHT', 1)
+    decay = getattr(settings, 'BLOG_TRENDING_DECAY_SECONDS', 45000)
+    rows = (
+        Post.objects.exclude(likes_count=0, views_count=0)
+        .order_by('pk')
+        .values_list('pk', 'likes_count', 'views_count', 'created_at')
+        .iterator(chunk_size=1000)
+    )
+    scores = (
+        TrendingScore(
+            post_id=pk,
+            score=math.log10(max(likes * like_weight + views * view_weight, 1))
+            + created_at.timestamp() / decay,
+        )
+        for pk, likes, views, created_at in rows
+    )
+    while batch := list(islice(scores, 1000)):
+        TrendingScore.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='blog.post')),
+                ('score', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score', '-post'], name='blog_trending_score_idx')],
+            },
+        ),
+        migrations.RunPython(fill_trending_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_author_stats(apps, schema_editor):
+    """Начальные строки статистики по существующим постам"""
+    Post = apps.get_model('blog', 'Post')
+    AuthorStats = apps.get_model('blog', 'AuthorStats')
+    rows = (
+        Post.objects.order_by()
+        .values('author_id')
+        .annotate(posts=Count('id'), views=Sum('views_count'), likes=Sum('likes_count'))
+    )
+    AuthorStats.objects.bulk_create(
+        (
+            AuthorStats(
+                user_id=row['author_id'],
+                posts_count=row['posts'],
+                views_count=row['views'],
+                likes_count=row['likes'],
+            )
+            for row in rows
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('blog', '0006_trending_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='author_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+                ('views_count', models.PositiveBigIntegerField(default=0)),
+                ('likes_count', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,22 @@
 from django.contrib.auth.models import User
-from django.db import models
-from django.db.models import F
+from django.db import connection, models
+from django.db.models import Exists, F, OuterRef, Value
+
+from .locking import retry_on_lock
+
+# Наибольший первичный ключ (BigAutoField); большие id драйвер БД не принимает
+MAX_PK = 2**63 - 1
+
+
+class PostQuerySet(models.QuerySet):
+    """QuerySet постов"""
+
+    def with_liked_by_me(self, user):
+        """Аннотировать liked_by_me одним подзапросом EXISTS к лайкам пользователя"""
+        if not user.is_authenticated:
+            return self.annotate(liked_by_me=Value(False))
+        likes = Like.objects.filter(post=OuterRef("pk"), user=user)
+        return self.annotate(liked_by_me=Exists(likes))
 
 
 class Post(models.Model):
@@ -12,19 +28,45 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     views_count = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Ключ курсорной пагинации списка постов
+            models.Index(fields=["-created_at", "-id"], name="blog_post_created_id_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
     def increment_views(self):
         """Атомарно увеличить счетчик просмотров"""
-        Post.objects.filter(pk=self.pk).update(views_count=F("views_count") + 1)
+        retry_on_lock(Post.objects.filter(pk=self.pk).update)(views_count=F("views_count") + 1)
         # Обновляем объект
         self.refresh_from_db()
 
+    @classmethod
+    def apply_likes_delta(cls, pk, delta):
+        """Атомарно изменить счетчик лайков одним UPDATE ... RETURNING.
+
+        Возвращает новое значение счетчика или None, если поста нет.
+        Счетчик не уходит в минус, даже если разошелся с таблицей лайков.
+        """
+        table = connection.ops.quote_name(cls._meta.db_table)
+        pk_column = connection.ops.quote_name(cls._meta.pk.column)
+        column = connection.ops.quote_name("likes_count")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {column} = CASE WHEN {column} + %s < 0 THEN 0 "
+                f"ELSE {column} + %s END WHERE {pk_column} = %s RETURNING {column}",
+                [delta, delta, pk],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
 
 class SubPost(models.Model):
     """Модель под-поста"""
@@ -54,3 +96,64 @@ class Like(models.Model):
 
     def __str__(self):
         return f"{self.user.username} liked {self.post.title}"
+
+
+class ImportCheckpoint(models.Model):
+    """Позиция импорта JSONL-файла (manage.py import_posts) для продолжения после сбоя.
+
+    Обновляется в той же транзакции, что и вставка пакета, поэтому пакет не
+    может быть ни потерян, ни вставлен повторно.
+    """
+
+    source = models.CharField(max_length=500, unique=True)
+    offset = models.BigIntegerField(default=0)
+    line = models.PositiveIntegerField(default=0)
+    posts = models.PositiveIntegerField(default=0)
+    subposts = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}: строка {self.line}"
+
+
+class TrendingScore(models.Model):
+    """Предвычисленный рейтинг «горячих» постов (см. blog/trending.py).
+
+    Строка пересчитывается при лайке и просмотре поста, поэтому
+    ``GET /api/posts/trending/`` читает только страницу по индексу на score.
+    """
+
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE, primary_key=True, related_name="trending"
+    )
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Ключ курсорной пагинации ленты популярных постов
+            models.Index(fields=["-score", "-post"], name="blog_trending_score_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id}: {self.score:.3f}"
+
+
+class AuthorStats(models.Model):
+    """Статистика автора: посты, просмотры и лайки его постов (см. blog/author_stats.py).
+
+    Счетчики изменяются вместе с записью, которая их меняет, поэтому
+    ``GET /api/authors/{id}/stats/`` читает одну строку вместо агрегации.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="author_stats"
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    views_count = models.PositiveBigIntegerField(default=0)
+    likes_count = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.posts_count} постов"
@@ -0,0 +1,119 @@
+"""Профилирование отдельных запросов по заголовку ``X-Profile: 1``.
+
+Запрос выполняется под cProfile (или под семплирующим pyinstrument, если он
+установлен и выбран в ``BLOG_PROFILER_BACKEND``), результат сохраняется в
+``BLOG_PROFILER_DIR``: ``.prof`` для pstats/snakeviz/flameprof или
+``.speedscope.json`` для speedscope. Имя файла возвращается в заголовке
+``X-Profile-File``. Список и сводка — ``python manage.py blog_profiles``.
+"""
+
+import cProfile
+import re
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.utils import timezone
+
+PROFILE_SUFFIXES = (".prof", ".speedscope.json")
+
+
+def get_profile_dir():
+    return Path(settings.BLOG_PROFILER_DIR)
+
+
+def _profile_name(request, elapsed, suffix):
+    path = re.sub(r"[^\w-]+", "_", request.path.strip("/")) or "root"
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%S%f")
+    return f"{stamp}-{request.method}-{path}-{elapsed * 1000:.0f}ms{suffix}"
+
+
+class _CProfileBackend:
+    suffix = ".prof"
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+
+    def save(self, path):
+        self.profiler.dump_stats(path)
+
+
+class _PyinstrumentBackend:
+    suffix = ".speedscope.json"
+
+    def __init__(self):
+        from pyinstrument import Profiler
+
+        self.profiler = Profiler()
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def save(self, path):
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        Path(path).write_text(self.profiler.output(renderer=SpeedscopeRenderer()))
+
+
+BACKENDS = {"cprofile": _CProfileBackend, "pyinstrument": _PyinstrumentBackend}
+
+
+class RequestProfilerMiddleware:
+    """Профилирует запросы с заголовком X-Profile от персонала (или всех, если разрешено)"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "BLOG_PROFILER_ENABLED", False):
+            raise MiddlewareNotUsed
+        backend = getattr(settings, "BLOG_PROFILER_BACKEND", "cprofile")
+        if backend not in BACKENDS:
+            raise ImproperlyConfigured(f"Неизвестный BLOG_PROFILER_BACKEND: {backend}")
+        if backend == "pyinstrument":
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError:
+                # Семплирующий профилировщик не установлен — используем cProfile
+                backend = "cprofile"
+        self.backend = BACKENDS[backend]
+        self.get_response = get_response
+
+    def is_allowed(self, request):
+        if request.headers.get("X-Profile") != "1":
+            return False
+        if not getattr(settings, "BLOG_PROFILER_STAFF_ONLY", True):
+            return True
+        user = getattr(request, "user", None)
+        return bool(user and user.is_staff)
+
+    def __call__(self, request):
+        if not self.is_allowed(request):
+            return self.get_response(request)
+
+        profiler = self.backend()
+        started = time.perf_counter()
+        try:
+            profiler.start()
+        except ValueError:
+            # В этом потоке уже работает другой профилировщик
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        elapsed = time.perf_counter() - started
+
+        directory = get_profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        name = _profile_name(request, elapsed, profiler.suffix)
+        profiler.save(directory / name)
+        response["X-Profile-File"] = name
+        return response
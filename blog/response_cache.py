@@ -0,0 +1,124 @@
+"""Версионированный кеш ответов API на кеш-фреймворке Django.
+
+Ключ ответа строится из имени эндпойнта, номера версии и пути с параметрами
+запроса. Запись через API увеличивает версию, поэтому старые ключи больше
+не читаются и клиенты не видят устаревших данных.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+PREFIX = "blog:resp:"
+POSTS_VERSION_KEY = f"{PREFIX}version:posts"
+
+
+def post_version_key(pk):
+    return f"{PREFIX}version:post:{pk}"
+
+
+def get_cache():
+    """Отдельный алиас BLOG_RESPONSE_CACHE_ALIAS: вытеснение ответов не задевает
+    буфер просмотров и закрепление за primary в кеше по умолчанию"""
+    return caches[getattr(settings, "BLOG_RESPONSE_CACHE_ALIAS", "default")]
+
+
+def is_enabled():
+    return getattr(settings, "BLOG_RESPONSE_CACHE_ENABLED", False)
+
+
+def get_timeout(endpoint):
+    return getattr(settings, "BLOG_RESPONSE_CACHE_TIMEOUTS", {}).get(endpoint, 60)
+
+
+def get_version(key):
+    """Текущая версия; при отсутствии ключа начинается с метки времени в мс,
+    чтобы после вытеснения из кеша не совпасть со старыми версиями"""
+    version = get_cache().get(key)
+    if version is None:
+        get_cache().add(key, int(time.time() * 1000), timeout=None)
+        version = get_cache().get(key)
+    return version
+
+
+def _bump(key):
+    try:
+        get_cache().incr(key)
+    except ValueError:
+        get_version(key)
+
+
+def bump_posts():
+    """Сбросить кеш списка постов"""
+    transaction.on_commit(lambda: _bump(POSTS_VERSION_KEY))
+
+
+def bump_post(*pks):
+    """Сбросить кеш деталей постов и списка постов"""
+
+    def bump():
+        for pk in pks:
+            _bump(post_version_key(pk))
+        _bump(POSTS_VERSION_KEY)
+
+    transaction.on_commit(bump)
+
+
+def _record(endpoint, outcome):
+    key = f"{PREFIX}stats:{endpoint}:{outcome}"
+    if not get_cache().add(key, 1, timeout=None):
+        try:
+            get_cache().incr(key)
+        except ValueError:
+            get_cache().add(key, 1, timeout=None)
+
+
+def get_stats():
+    """Счетчики попаданий и промахов по эндпойнтам"""
+    timeouts = getattr(settings, "BLOG_RESPONSE_CACHE_TIMEOUTS", {})
+    stats = {}
+    for endpoint, timeout in timeouts.items():
+        stats[endpoint] = {
+            "hits": get_cache().get(f"{PREFIX}stats:{endpoint}:hit", 0),
+            "misses": get_cache().get(f"{PREFIX}stats:{endpoint}:miss", 0),
+            "timeout": timeout,
+        }
+    return stats
+
+
+class ResponseCacheMixin:
+    """Кеширование ответов GET для generic-представлений DRF"""
+
+    cache_endpoint = None
+
+    def get_cache_version_key(self):
+        return POSTS_VERSION_KEY
+
+    def get_cache_key(self, request):
+        version = get_version(self.get_cache_version_key())
+        query = sorted(request.query_params.lists())
+        # liked_by_me зависит от пользователя, поэтому он входит в ключ
+        user = request.user.pk if request.user.is_authenticated else None
+        digest = hashlib.md5(f"{request.path}?{query}#{user}".encode()).hexdigest()
+        return f"{PREFIX}{self.cache_endpoint}:{version}:{digest}"
+
+    def get(self, request, *args, **kwargs):
+        if not is_enabled():
+            return super().get(request, *args, **kwargs)
+
+        key = self.get_cache_key(request)
+        data = get_cache().get(key)
+        if data is not None:
+            _record(self.cache_endpoint, "hit")
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            get_cache().set(key, response.data, timeout=get_timeout(self.cache_endpoint))
+        _record(self.cache_endpoint, "miss")
+        response["X-Cache"] = "MISS"
+        return response
@@ -0,0 +1,164 @@
+"""Полнотекстовый поиск по постам и под-постам.
+
+SQLite: FTS5-таблицы с внешним содержимым (``blog_post_fts``,
+``blog_subpost_fts``), синхронизируемые триггерами при любой записи.
+PostgreSQL: генерируемые колонки ``search_vector`` (tsvector) с GIN-индексами.
+
+В обоих случаях индекс обновляется самой БД, поэтому ``bulk_create``,
+``bulk_update`` и массовые удаления не требуют отдельной синхронизации.
+Результаты упорядочены по релевантности (меньший score — выше) и id поста.
+"""
+
+import re
+
+from django.db import connection
+
+SQLITE_SCHEMA = [
+    # Посты
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts "
+    "USING fts5(title, body, content='blog_post', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_ai AFTER INSERT ON blog_post BEGIN "
+    "INSERT INTO blog_post_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_ad AFTER DELETE ON blog_post BEGIN "
+    "INSERT INTO blog_post_fts(blog_post_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_au AFTER UPDATE OF title, body ON blog_post BEGIN "
+    "INSERT INTO blog_post_fts(blog_post_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO blog_post_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    # Под-посты
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blog_subpost_fts "
+    "USING fts5(title, body, post_id UNINDEXED, content='blog_subpost', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS blog_subpost_fts_ai AFTER INSERT ON blog_subpost BEGIN "
+    "INSERT INTO blog_subpost_fts(rowid, title, body, post_id) "
+    "VALUES (new.id, new.title, new.body, new.post_id); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_subpost_fts_ad AFTER DELETE ON blog_subpost BEGIN "
+    "INSERT INTO blog_subpost_fts(blog_subpost_fts, rowid, title, body, post_id) "
+    "VALUES ('delete', old.id, old.title, old.body, old.post_id); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_subpost_fts_au "
+    "AFTER UPDATE OF title, body, post_id ON blog_subpost BEGIN "
+    "INSERT INTO blog_subpost_fts(blog_subpost_fts, rowid, title, body, post_id) "
+    "VALUES ('delete', old.id, old.title, old.body, old.post_id); "
+    "INSERT INTO blog_subpost_fts(rowid, title, body, post_id) "
+    "VALUES (new.id, new.title, new.body, new.post_id); END",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS blog_post_fts_ai",
+    "DROP TRIGGER IF EXISTS blog_post_fts_ad",
+    "DROP TRIGGER IF EXISTS blog_post_fts_au",
+    "DROP TRIGGER IF EXISTS blog_subpost_fts_ai",
+    "DROP TRIGGER IF EXISTS blog_subpost_fts_ad",
+    "DROP TRIGGER IF EXISTS blog_subpost_fts_au",
+    "DROP TABLE IF EXISTS blog_post_fts",
+    "DROP TABLE IF EXISTS blog_subpost_fts",
+]
+
+POSTGRES_SCHEMA = [
+    "ALTER TABLE blog_post ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(title, '') || ' ' || "
+    "coalesce(body, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS blog_post_search_idx ON blog_post USING GIN (search_vector)",
+    "ALTER TABLE blog_subpost ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(title, '') || ' ' || "
+    "coalesce(body, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS blog_subpost_search_idx ON blog_subpost USING GIN (search_vector)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS blog_post_search_idx",
+    "ALTER TABLE blog_post DROP COLUMN IF EXISTS search_vector",
+    "DROP INDEX IF EXISTS blog_subpost_search_idx",
+    "ALTER TABLE blog_subpost DROP COLUMN IF EXISTS search_vector",
+]
+
+# Лучшая (минимальная) оценка поста среди совпадений в нем и в его под-постах
+SQLITE_SEARCH = """
+    SELECT post_id, score FROM (
+        SELECT post_id, MIN(score) AS score FROM (
+            SELECT rowid AS post_id, bm25(blog_post_fts) AS score
+            FROM blog_post_fts WHERE blog_post_fts MATCH %s
+            UNION ALL
+            SELECT post_id, bm25(blog_subpost_fts) AS score
+            FROM blog_subpost_fts WHERE blog_subpost_fts MATCH %s
+        ) GROUP BY post_id
+    ) WHERE score > %s OR (score = %s AND post_id > %s)
+    ORDER BY score, post_id LIMIT %s
+"""
+
+POSTGRES_SEARCH = """
+    SELECT post_id, score FROM (
+        SELECT post_id, MIN(score) AS score FROM (
+            SELECT id AS post_id, -ts_rank(search_vector, query) AS score
+            FROM blog_post, plainto_tsquery('simple', %s) query
+            WHERE search_vector @@ query
+            UNION ALL
+            SELECT post_id, -ts_rank(search_vector, query) AS score
+            FROM blog_subpost, plainto_tsquery('simple', %s) query
+            WHERE search_vector @@ query
+        ) matches GROUP BY post_id
+    ) ranked WHERE score > %s OR (score = %s AND post_id > %s)
+    ORDER BY score, post_id LIMIT %s
+"""
+
+
+def _execute(conn, statements):
+    with conn.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(conn=connection):
+    """Создать поисковый индекс (идемпотентно)"""
+    _execute(conn, {"sqlite": SQLITE_SCHEMA, "postgresql": POSTGRES_SCHEMA}.get(conn.vendor, []))
+
+
+def uninstall(conn=connection):
+    """Удалить поисковый индекс"""
+    _execute(conn, {"sqlite": SQLITE_DROP, "postgresql": POSTGRES_DROP}.get(conn.vendor, []))
+
+
+def rebuild(conn=connection):
+    """Пересоздать поисковый индекс по текущему содержимому таблиц"""
+    install(conn)
+    if conn.vendor == "sqlite":
+        _execute(
+            conn,
+            [
+                "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')",
+                "INSERT INTO blog_subpost_fts(blog_subpost_fts) VALUES ('rebuild')",
+            ],
+        )
+    elif conn.vendor == "postgresql":
+        _execute(
+            conn,
+            [
+                "REINDEX INDEX blog_post_search_idx",
+                "REINDEX INDEX blog_subpost_search_idx",
+                "ANALYZE blog_post",
+                "ANALYZE blog_subpost",
+            ],
+        )
+
+
+def search_posts(query, after=None, limit=20):
+    """Найти посты по запросу, вернуть список (post_id, score).
+
+    ``after`` — (score, post_id) последней строки предыдущей страницы.
+    """
+    if connection.vendor == "sqlite":
+        # Каждое слово берем в кавычки, чтобы спецсимволы не ломали синтаксис FTS5
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        query = " ".join(f'"{word}"' for word in words)
+        sql = SQLITE_SEARCH
+    elif connection.vendor == "postgresql":
+        sql = POSTGRES_SEARCH
+    else:
+        raise NotImplementedError(f"Полнотекстовый поиск не поддерживается для {connection.vendor}")
+
+    score, post_id = after or (float("-inf"), 0)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [query, query, score, score, post_id, limit])
+        return cursor.fetchall()
@@ -1,8 +1,16 @@
+from collections import Counter
+
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Like, Post, SubPost
+from . import author_stats, bulk
+from .models import MAX_PK, Like, Post, SubPost
+from .sparse_fields import SparseFieldsSerializerMixin
+from .timing import TimedSerializerMixin
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -13,20 +21,25 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "email"]
 
 
-class SubPostSerializer(serializers.ModelSerializer):
+class SubPostSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Сериализатор под-поста"""
 
+    # Записываемый id нужен, чтобы обновлять существующие под-посты через пост
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = SubPost
         fields = ["id", "title", "body", "created_at", "updated_at"]
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(
+    TimedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор поста с поддержкой под-постов"""
 
     author = UserSerializer(read_only=True)
     subposts = SubPostSerializer(many=True, required=False)
-    likes_count = serializers.IntegerField(source="likes.count", read_only=True)
+    liked_by_me = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
@@ -39,8 +52,14 @@ class PostSerializer(serializers.ModelSerializer):
             "updated_at",
             "views_count",
             "likes_count",
+            "liked_by_me",
             "subposts",
         ]
+        read_only_fields = ["likes_count"]
+
+    def get_liked_by_me(self, obj):
+        # Аннотация из PostQuerySet.with_liked_by_me; у только что созданных постов ее нет
+        return bool(getattr(obj, "liked_by_me", False))
 
     def create(self, validated_data):
         """Создание поста с под-постами"""
@@ -50,8 +69,10 @@ class PostSerializer(serializers.ModelSerializer):
             post = Post.objects.create(**validated_data)
 
             for subpost_data in subposts_data:
+                subpost_data.pop("id", None)
                 SubPost.objects.create(post=post, **subpost_data)
 
+            author_stats.add_author_deltas(post.author_id, posts=1)
             return post
 
     def update(self, instance, validated_data):
@@ -66,56 +87,146 @@ class PostSerializer(serializers.ModelSerializer):
 
             # Обрабатываем под-посты если они переданы
             if subposts_data is not None:
-                # Получаем ID существующих под-постов из запроса
-                existing_ids = set()
-                for subpost_data in subposts_data:
-                    subpost_id = subpost_data.get("id")
-                    if subpost_id:
-                        # Обновляем существующий под-пост
-                        try:
-                            subpost = instance.subposts.get(id=subpost_id)
-                            for attr, value in subpost_data.items():
-                                if attr != "id":
-                                    setattr(subpost, attr, value)
-                            subpost.save()
-                            existing_ids.add(subpost_id)
-                        except SubPost.DoesNotExist:
-                            pass
-                    else:
-                        # Создаем новый под-пост
-                        subpost = SubPost.objects.create(post=instance, **subpost_data)
-                        existing_ids.add(subpost.id)
-
-                # Удаляем под-посты, которых нет в новом списке
-                instance.subposts.exclude(id__in=existing_ids).delete()
+                self._reconcile_subposts(instance, subposts_data)
 
             return instance
 
-
-class PostCreateManySerializer(serializers.Serializer):
+    def _reconcile_subposts(self, instance, subposts_data):
+        """Привести под-посты к переданному списку фиксированным числом запросов"""
+        existing = {subpost.id: subpost for subpost in instance.subposts.all()}
+
+        requested_ids = {data["id"] for data in subposts_data if data.get("id")}
+        foreign_ids = requested_ids - existing.keys()
+        if foreign_ids:
+            raise serializers.ValidationError(
+                {"subposts": [f"Под-посты {sorted(foreign_ids)} не принадлежат этому посту"]}
+            )
+
+        now = timezone.now()
+        to_update = []
+        to_create = []
+        update_fields = {"updated_at"}
+        for subpost_data in subposts_data:
+            subpost_id = subpost_data.pop("id", None)
+            if subpost_id:
+                # Обновляем существующий под-пост
+                subpost = existing[subpost_id]
+                for attr, value in subpost_data.items():
+                    setattr(subpost, attr, value)
+                    update_fields.add(attr)
+                subpost.updated_at = now
+                to_update.append(subpost)
+            else:
+                # Создаем новый под-пост
+                to_create.append(SubPost(post=instance, **subpost_data))
+
+        # Удаляем под-посты, которых нет в новом списке
+        removed_ids = existing.keys() - requested_ids
+        if removed_ids:
+            SubPost.objects.filter(pk__in=removed_ids).delete()
+        if to_update:
+            SubPost.objects.bulk_update(to_update, sorted(update_fields))
+        if to_create:
+            SubPost.objects.bulk_create(to_create)
+
+
+class PostCreateManySerializer(TimedSerializerMixin, serializers.Serializer):
     """Сериализатор для массового создания постов"""
 
     posts = PostSerializer(many=True)
 
     def create(self, validated_data):
-        """Массовое создание постов"""
+        """Массовое создание постов пакетными INSERT-запросами"""
         posts_data = validated_data["posts"]
+        batch_size = self.context.get(
+            "batch_size", getattr(settings, "BLOG_BULK_CREATE_BATCH_SIZE", 500)
+        )
+
         posts = []
+        subposts_per_post = []
+        for post_data in posts_data:
+            subposts_per_post.append(post_data.pop("subposts", []))
+            posts.append(Post(**post_data))
 
         with transaction.atomic():
-            for post_data in posts_data:
-                subposts_data = post_data.pop("subposts", [])
-                post = Post.objects.create(**post_data)
+            # Сначала все посты, чтобы получить их первичные ключи
+            Post.objects.bulk_create(posts, batch_size=batch_size)
+
+            # Затем все под-посты одним набором пакетов
+            subposts = [
+                SubPost(post=post, **{k: v for k, v in subpost_data.items() if k != "id"})
+                for post, subposts_data in zip(posts, subposts_per_post)
+                for subpost_data in subposts_data
+            ]
+            SubPost.objects.bulk_create(subposts, batch_size=batch_size)
 
-                for subpost_data in subposts_data:
-                    SubPost.objects.create(post=post, **subpost_data)
+            for author_id, count in Counter(post.author_id for post in posts).items():
+                author_stats.add_author_deltas(author_id, posts=count)
 
-                posts.append(post)
+        # Подгружаем под-посты для ответа одним запросом вместо N
+        prefetch_related_objects(posts, "subposts")
 
         return {"posts": posts}
 
 
-class SubPostDetailSerializer(serializers.ModelSerializer):
+class PostBulkFilterSerializer(serializers.Serializer):
+    """Фильтр постов для массовых операций (см. blog/bulk.py)"""
+
+    author = serializers.IntegerField(required=False, min_value=1, max_value=MAX_PK)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    title_contains = serializers.CharField(required=False, max_length=200)
+
+    def validate(self, attrs):
+        # Пустой фильтр задел бы все посты
+        if not attrs:
+            raise serializers.ValidationError("Фильтр должен содержать хотя бы одно условие.")
+        return attrs
+
+
+class PostBulkSerializer(serializers.Serializer):
+    """Посты массовой операции: список ids или filter"""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_PK),
+        required=False,
+        allow_empty=False,
+    )
+    filter = PostBulkFilterSerializer(required=False)
+
+    def validate_ids(self, value):
+        max_posts = bulk.get_max_posts()
+        if len(value) > max_posts:
+            raise serializers.ValidationError(f"Не более {max_posts} идентификаторов за запрос.")
+        return sorted(set(value))
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Укажите либо ids, либо filter.")
+        return attrs
+
+
+class PostBulkValuesSerializer(serializers.Serializer):
+    """Новые значения полей при массовом изменении постов"""
+
+    title = serializers.CharField(required=False, max_length=200)
+    body = serializers.CharField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Укажите хотя бы одно поле.")
+        return attrs
+
+
+class PostBulkUpdateSerializer(PostBulkSerializer):
+    """Массовое изменение постов"""
+
+    values = PostBulkValuesSerializer()
+
+
+class SubPostDetailSerializer(
+    TimedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     """Детальный сериализатор под-поста"""
 
     post = serializers.PrimaryKeyRelatedField(queryset=Post.objects.all())
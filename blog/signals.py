@@ -1,2 +1,20 @@
-# Файл пока не используется - удалены сигналы для UserProfile
-# Можно использовать для будущих сигналов если потребуется
+"""Обработчики сигналов приложения blog (подключаются в ``BlogConfig.ready``)."""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Профиль производительности SQLite для каждого нового соединения.
+
+    При ``BLOG_SQLITE_PERFORMANCE = True`` выполняет PRAGMA из
+    ``BLOG_SQLITE_PRAGMAS``: WAL (читатели не блокируют писателя),
+    ``synchronous=NORMAL``, ``mmap_size``, ``cache_size`` и ``busy_timeout``.
+    """
+    if connection.vendor != "sqlite" or not getattr(settings, "BLOG_SQLITE_PERFORMANCE", False):
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, "BLOG_SQLITE_PRAGMAS", {}).items():
+            cursor.execute(f"PRAGMA {name} = {value}")
@@ -0,0 +1,117 @@
+"""Выборочные поля ответа: ``?fields=``, ``?omit=`` и ``?body_preview=N``.
+
+Невыбранные поля убираются из сериализатора и откладываются в запросе
+через ``.defer()``, поэтому их колонки не читаются из БД.
+"""
+
+from django.db.models import Prefetch
+from django.db.models.functions import Substr
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _split(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class SparseFieldsSerializerMixin:
+    """Применяет fields / omit / body_preview из контекста к полям сериализатора"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        if self.context.get("body_preview") and "body" in fields:
+            fields["body"] = serializers.CharField(source="body_preview", read_only=True)
+
+        # fields / omit относятся только к сериализатору верхнего уровня
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is None:
+            only = self.context.get("fields")
+            omit = self.context.get("omit", set())
+            fields = {
+                name: field
+                for name, field in fields.items()
+                if (not only or name in only) and name not in omit
+            }
+        return fields
+
+
+class SparseFieldsMixin:
+    """Выборочные поля для GET-запросов generic-представлений DRF"""
+
+    # Разрешен ли ?body_preview=N (только для списков)
+    body_preview_allowed = False
+    # Связи, которые подгружаются prefetch_related, только если поле запрошено
+    sparse_prefetch = ()
+
+    @cached_property
+    def sparse_params(self):
+        if self.request.method not in SAFE_METHODS:
+            return {}
+
+        query_params = self.request.query_params
+        params = {}
+        if query_params.get("fields"):
+            params["fields"] = _split(query_params["fields"])
+        if query_params.get("omit"):
+            params["omit"] = _split(query_params["omit"])
+        if self.body_preview_allowed and query_params.get("body_preview"):
+            try:
+                params["body_preview"] = int(query_params["body_preview"])
+            except ValueError:
+                params["body_preview"] = 0
+            if params["body_preview"] <= 0:
+                raise serializers.ValidationError(
+                    {"body_preview": ["Ожидается положительное целое число."]}
+                )
+        return params
+
+    def is_field_requested(self, name):
+        only = self.sparse_params.get("fields")
+        return (not only or name in only) and name not in self.sparse_params.get("omit", ())
+
+    def get_sparse_required_fields(self):
+        """Поля модели, которые нужно читать всегда (например, для пагинации)"""
+        return ()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context.update(self.sparse_params)
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        preview = self.sparse_params.get("body_preview")
+
+        for name in self.sparse_prefetch:
+            if not self.is_field_requested(name):
+                continue
+            if preview:
+                related_model = queryset.model._meta.get_field(name).related_model
+                related = related_model.objects.defer("body").annotate(
+                    body_preview=Substr("body", 1, preview)
+                )
+                queryset = queryset.prefetch_related(Prefetch(name, queryset=related))
+            else:
+                queryset = queryset.prefetch_related(name)
+
+        if not self.sparse_params:
+            return queryset
+
+        required = self.get_sparse_required_fields()
+        deferred = [
+            field.name
+            for field in queryset.model._meta.concrete_fields
+            if not field.primary_key
+            and field.name not in required
+            and not self.is_field_requested(field.name)
+        ]
+        if preview and self.is_field_requested("body"):
+            deferred.append("body")
+            queryset = queryset.annotate(body_preview=Substr("body", 1, preview))
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        return queryset
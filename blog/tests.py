@@ -1,11 +1,43 @@
 
+import csv
+import json
+import math
+import pstats
+import re
+import tempfile
+import threading
+import time
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.db.utils import load_backend
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 
-from blog.models import Like, Post, SubPost
+from blog import api_urls, async_views, export, search, trending
+from blog.api_views import PostListCreateView
+from blog.fast_serialization import post_values, serialize_posts
+from blog.locking import retry_on_lock
+from blog.models import AuthorStats, ImportCheckpoint, Like, Post, SubPost, TrendingScore
+from blog.serializers import PostSerializer
+from blog.view_buffer import CacheViewBuffer, LocalViewBuffer
 
 
 class PostModelTest(TestCase):
@@ -199,6 +231,37 @@ class PostAPITest(APITestCase):
         self.assertEqual(Post.objects.count(), 2)
         self.assertEqual(SubPost.objects.count(), 3)
 
+    def test_bulk_create_posts_batched_queries(self):
+        """Тест пакетной вставки: число запросов не зависит от количества постов"""
+        url = reverse('post-bulk-create')
+        data = {
+            'posts': [
+                {
+                    'title': f'Post {i}',
+                    'body': f'Content {i}',
+                    'subposts': [
+                        {'title': f'Sub {i}.{j}', 'body': f'Sub content {i}.{j}'}
+                        for j in range(3)
+                    ]
+                }
+                for i in range(30)
+            ]
+        }
+        # Включая одно обновление статистики автора
+        with self.assertNumQueries(6):
+            response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 30)
+        self.assertEqual(SubPost.objects.count(), 90)
+        for item in response.data:
+            post = Post.objects.get(pk=item['id'])
+            self.assertEqual(item['title'], post.title)
+            self.assertEqual(
+                [subpost['id'] for subpost in item['subposts']],
+                list(post.subposts.values_list('id', flat=True))
+            )
+
     def test_update_post_subposts(self):
         """Тест обновления под-постов при обновлении поста"""
         # Создаем пост с под-постами
@@ -244,6 +307,81 @@ class PostAPITest(APITestCase):
         self.assertEqual(post.subposts.count(), 2)
         self.assertFalse(SubPost.objects.filter(id=subpost2.id).exists())
 
+    def test_update_post_subposts_keeps_ids(self):
+        """Тест обновления существующих под-постов по id"""
+        post = Post.objects.create(
+            title='Original Post',
+            body='Original content',
+            author=self.user
+        )
+        subpost = SubPost.objects.create(
+            title='Original Sub',
+            body='Original sub content',
+            post=post
+        )
+
+        url = reverse('post-detail', kwargs={'pk': post.pk})
+        data = {
+            'title': 'Updated Post',
+            'body': 'Updated content',
+            'subposts': [
+                {'id': subpost.id, 'title': 'Updated Sub', 'body': 'Updated sub content'}
+            ]
+        }
+        response = self.client.put(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['subposts'][0]['id'], subpost.id)
+        subpost.refresh_from_db()
+        self.assertEqual(subpost.title, 'Updated Sub')
+        self.assertGreater(subpost.updated_at, subpost.created_at)
+
+    def test_update_post_rejects_foreign_subposts(self):
+        """Тест отказа при передаче под-поста другого поста"""
+        post = Post.objects.create(title='Post', body='Content', author=self.user)
+        other_post = Post.objects.create(title='Other', body='Other', author=self.user)
+        foreign = SubPost.objects.create(title='Foreign', body='Foreign', post=other_post)
+
+        url = reverse('post-detail', kwargs={'pk': post.pk})
+        data = {
+            'title': 'Updated Post',
+            'body': 'Updated content',
+            'subposts': [{'id': foreign.id, 'title': 'Stolen', 'body': 'Stolen'}]
+        }
+        response = self.client.put(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('subposts', response.data)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.title, 'Foreign')
+        post.refresh_from_db()
+        self.assertEqual(post.title, 'Post')
+
+    def test_update_post_subposts_query_count(self):
+        """Тест: число запросов не зависит от количества под-постов"""
+        for size in (2, 20):
+            post = Post.objects.create(title='Post', body='Content', author=self.user)
+            subposts = [
+                SubPost.objects.create(title=f'Sub {i}', body=f'Sub {i}', post=post)
+                for i in range(size * 2)
+            ]
+            data = {
+                'title': 'Updated Post',
+                'body': 'Updated content',
+                'subposts': [
+                    {'id': subpost.id, 'title': 'Updated', 'body': 'Updated'}
+                    for subpost in subposts[:size]
+                ] + [
+                    {'title': 'New', 'body': 'New'} for _ in range(size)
+                ]
+            }
+            url = reverse('post-detail', kwargs={'pk': post.pk})
+            with self.assertNumQueries(11):
+                response = self.client.put(url, data, format='json')
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(post.subposts.count(), size * 2)
+
     def test_like_Post(self):
         """Тест лайка поста"""
         post = Post.objects.create(
@@ -285,6 +423,109 @@ class PostAPITest(APITestCase):
         self.assertFalse(response.data['liked'])
         self.assertEqual(Like.objects.filter(post=post, user=self.user).count(), 0)
 
+    def test_like_updates_likes_count_column(self):
+        """Тест денормализованного счетчика лайков в списке постов"""
+        post = Post.objects.create(
+            title='Test Post',
+            body='Test content',
+            author=self.user
+        )
+        self.client.post(reverse('post-like', kwargs={'pk': post.pk}))
+
+        post.refresh_from_db()
+        self.assertEqual(post.likes_count, 1)
+
+        response = self.client.get(reverse('post-list-create'))
+        self.assertEqual(response.data['results'][0]['likes_count'], 1)
+
+    def test_recount_likes_command(self):
+        """Тест команды восстановления счетчиков лайков"""
+        post = Post.objects.create(
+            title='Test Post',
+            body='Test content',
+            author=self.user
+        )
+        other = User.objects.create_user(username='other', password='testpass123')
+        # Лайки в обход like_post, счетчик расходится с таблицей
+        Like.objects.create(post=post, user=self.user)
+        Like.objects.create(post=post, user=other)
+        empty_post = Post.objects.create(
+            title='Empty Post',
+            body='Empty content',
+            author=self.user,
+            likes_count=5
+        )
+
+        out = StringIO()
+        call_command('recount_likes', batch_size=1, stdout=out)
+
+        post.refresh_from_db()
+        empty_post.refresh_from_db()
+        self.assertEqual(post.likes_count, 2)
+        self.assertEqual(empty_post.likes_count, 0)
+        self.assertIn('2', out.getvalue())
+
+    def test_like_toggle_without_select(self):
+        """Тест: переключение лайка без SELECT поста и COUNT(*)"""
+        post = Post.objects.create(
+            title='Test Post',
+            body='Test content',
+            author=self.user
+        )
+        url = reverse('post-like', kwargs={'pk': post.pk})
+
+        for expected_liked, expected_count in ((True, 1), (False, 0)):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(url)
+            self.assertEqual(response.data['liked'], expected_liked)
+            self.assertEqual(response.data['likes_count'], expected_count)
+            statements = [query['sql'].split()[0] for query in queries]
+            self.assertNotIn('SELECT', statements)
+
+    def test_like_missing_post(self):
+        """Тест лайка несуществующего поста"""
+        url = reverse('post-like', kwargs={'pk': 999})
+        response = self.client.post(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['detail'], 'No Post matches the given query.')
+        self.assertFalse(Like.objects.exists())
+
+    def test_like_out_of_range_post(self):
+        """Тест лайка поста с id больше допустимого ключа БД"""
+        url = reverse('post-like', kwargs={'pk': 2 ** 64})
+        response = self.client.post(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['detail'], 'No Post matches the given query.')
+
+    def test_like_state_batch(self):
+        """Тест пакетной проверки лайков текущего пользователя"""
+        posts = [
+            Post.objects.create(title=f'Post {i}', body=f'Content {i}', author=self.user)
+            for i in range(3)
+        ]
+        Like.objects.create(post=posts[1], user=self.user)
+        ids = ','.join(str(post.pk) for post in posts)
+
+        url = reverse('post-like-state')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'ids': ids})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['liked_by_me'], {
+            str(posts[0].pk): False,
+            str(posts[1].pk): True,
+            str(posts[2].pk): False,
+        })
+
+        for invalid in ('a,b', '0', '99999999999999999999'):
+            response = self.client.get(url, {'ids': invalid})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(BLOG_LIKE_STATE_MAX_IDS=2):
+            response = self.client.get(url, {'ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_view_post(self):
         """Тест увеличения счетчика просмотров"""
         post = Post.objects.create(
@@ -336,6 +577,1693 @@ class PostAPITest(APITestCase):
         self.assertEqual(len(response.data['results']), 20)  # default page size
 
 
+    def test_post_list_cursor_pagination(self):
+        """Тест курсорной пагинации списка постов"""
+        for i in range(25):
+            Post.objects.create(
+                title=f'Post {i}',
+                body=f'Content {i}',
+                author=self.user
+            )
+
+        url = reverse('post-list-create')
+        response = self.client.get(url, {'pagination': 'cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        first_page = [post['id'] for post in response.data['results']]
+        self.assertEqual(len(first_page), 20)
+
+        # Новый пост не должен сдвигать следующую страницу
+        Post.objects.create(title='Fresh Post', body='Fresh content', author=self.user)
+
+        response = self.client.get(response.data['next'])
+        second_page = [post['id'] for post in response.data['results']]
+        self.assertEqual(len(second_page), 5)
+        self.assertFalse(set(first_page) & set(second_page))
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+
+class SparseFieldsTest(APITestCase):
+    """Тесты выборочных полей ответа"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.post = Post.objects.create(
+            title='Test Post',
+            body='Long post content',
+            author=self.user
+        )
+        self.subpost = SubPost.objects.create(
+            title='Sub Post',
+            body='Long sub content',
+            post=self.post
+        )
+
+    def test_post_list_fields(self):
+        """Тест ?fields=: лишние колонки и под-посты не загружаются"""
+        url = reverse('post-list-create')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'id,title,likes_count'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data['results'][0]), {'id', 'title', 'likes_count'}
+        )
+        # COUNT(*) и выборка постов, без запроса под-постов
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"body"', queries[1]['sql'])
+
+    def test_post_detail_omit(self):
+        """Тест ?omit= для деталей поста"""
+        url = reverse('post-detail', kwargs={'pk': self.post.pk})
+        response = self.client.get(url, {'omit': 'body,subposts'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('body', response.data)
+        self.assertNotIn('subposts', response.data)
+        self.assertEqual(response.data['title'], 'Test Post')
+
+    def test_post_list_body_preview(self):
+        """Тест усечения текста в БД через ?body_preview="""
+        url = reverse('post-list-create')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'body_preview': 4})
+
+        post = response.data['results'][0]
+        self.assertEqual(post['body'], 'Long')
+        self.assertEqual(post['subposts'][0]['body'], 'Long')
+        # Выборка постов и под-постов усекает текст в SQL
+        for query in queries[1:3]:
+            columns, _, _ = query['sql'].partition('SUBSTR')
+            self.assertIn('AS "body_preview"', query['sql'])
+            self.assertNotIn('"body"', columns)
+
+    def test_body_preview_invalid(self):
+        """Тест некорректного значения body_preview"""
+        url = reverse('post-list-create')
+        response = self.client.get(url, {'body_preview': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_subpost_fields(self):
+        """Тест ?fields= для под-постов"""
+        response = self.client.get(reverse('subpost-list-create'), {'fields': 'id,post'})
+        self.assertEqual(response.data, [{'id': self.subpost.id, 'post': self.post.id}])
+
+        url = reverse('subpost-detail', kwargs={'pk': self.subpost.pk})
+        response = self.client.get(url, {'omit': 'body'})
+        self.assertNotIn('body', response.data)
+
+
+class LikedByMeTest(APITestCase):
+    """Тесты аннотации liked_by_me"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', body=f'Content {i}', author=self.user)
+            for i in range(30)
+        ]
+        for post in self.posts[::2]:
+            Like.objects.create(post=post, user=self.user)
+
+    def test_post_list_liked_by_me(self):
+        """Тест liked_by_me в списке постов"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('post-list-create'), {'page_size': 30})
+
+        liked = {post['id']: post['liked_by_me'] for post in response.data['results']}
+        self.assertEqual(liked, {post.pk: i % 2 == 0 for i, post in enumerate(self.posts)})
+
+    def test_post_detail_liked_by_me(self):
+        """Тест liked_by_me в деталях поста"""
+        url = reverse('post-detail', kwargs={'pk': self.posts[0].pk})
+        self.assertFalse(self.client.get(url).data['liked_by_me'])
+
+        self.client.force_authenticate(user=self.user)
+        self.assertTrue(self.client.get(url).data['liked_by_me'])
+
+    def test_post_list_constant_queries(self):
+        """Тест: число запросов не зависит от размера страницы"""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('post-list-create')
+        fields = 'id,title,author,likes_count,liked_by_me,subposts'
+        for page_size in (5, 30):
+            # COUNT(*), посты с EXISTS-подзапросом, под-посты
+            with self.assertNumQueries(3):
+                self.client.get(url, {'page_size': page_size})
+            with self.assertNumQueries(3):
+                self.client.get(url, {'page_size': page_size, 'fields': fields})
+
+
+class FastSerializationParityTest(APITestCase):
+    """Тесты совпадения быстрой сериализации с DRF-сериализаторами"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        other = User.objects.create_user(username='другой', password='testpass123')
+        for i in range(5):
+            post = Post.objects.create(
+                title=f'Пост {i} "quoted"',
+                body=f'Содержимое\nпоста {i}',
+                author=self.user if i % 2 else other,
+                views_count=i
+            )
+            for j in range(i % 3):
+                SubPost.objects.create(title=f'Sub {i}.{j}', body=f'Тело {j}', post=post)
+        Like.objects.create(post=post, user=self.user)
+        call_command('recount_likes', stdout=StringIO())
+
+    def assert_same_content(self, url, params=None):
+        with self.settings(BLOG_FAST_LIST_SERIALIZATION=False):
+            expected = self.client.get(url, params)
+        with self.settings(BLOG_FAST_LIST_SERIALIZATION=True):
+            actual = self.client.get(url, params)
+        self.assertEqual(actual.status_code, status.HTTP_200_OK)
+        self.assertEqual(actual.content, expected.content)
+
+    def test_serialize_posts_parity(self):
+        """Тест: serialize_posts совпадает с PostSerializer"""
+        queryset = Post.objects.all()
+        expected = JSONRenderer().render(
+            PostSerializer(queryset.prefetch_related('subposts'), many=True).data
+        )
+        actual = JSONRenderer().render(serialize_posts(post_values(queryset)))
+        self.assertEqual(actual, expected)
+
+    def test_post_list_parity(self):
+        """Тест совпадения ответа списка постов"""
+        url = reverse('post-list-create')
+        self.assert_same_content(url)
+        self.assert_same_content(url, {'page_size': 2, 'page': 2})
+        self.assert_same_content(url, {'pagination': 'cursor', 'page_size': 2})
+
+    def test_subpost_list_parity(self):
+        """Тест совпадения ответа списка под-постов"""
+        self.assert_same_content(reverse('subpost-list-create'))
+
+    def test_post_list_query_count(self):
+        """Тест: быстрый путь не делает запросов на каждый пост"""
+        with self.assertNumQueries(3):
+            self.client.get(reverse('post-list-create'))
+
+
+@override_settings(
+    BLOG_VIEWS_BUFFERED=True,
+    BLOG_VIEWS_FLUSH_THRESHOLD=1000,
+    BLOG_VIEWS_FLUSH_INTERVAL=3600,
+)
+class BufferedViewsTest(APITestCase):
+    """Тесты буферизованного счетчика просмотров"""
+
+    def setUp(self):
+        cache.clear()
+        caches['views'].clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.post = Post.objects.create(
+            title='Test Post',
+            body='Test content',
+            author=self.user
+        )
+
+    def tearDown(self):
+        call_command('flush_views', stdout=StringIO())
+
+    def test_buffered_view_post(self):
+        """Тест ответа с учетом незаписанных просмотров"""
+        url = reverse('post-view', kwargs={'pk': self.post.pk})
+
+        for expected in range(1, 4):
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.data['views_count'], expected)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 0)
+
+        call_command('flush_views', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 3)
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['views_count'], 4)
+
+    def test_buffered_view_missing_post(self):
+        """Тест просмотра несуществующего поста"""
+        url = reverse('post-view', kwargs={'pk': self.post.pk + 1})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_flush_threshold(self):
+        """Тест сброса буфера по порогу количества просмотров"""
+        url = reverse('post-view', kwargs={'pk': self.post.pk})
+        with self.settings(BLOG_VIEWS_FLUSH_THRESHOLD=2):
+            self.client.get(url)
+            self.client.get(url)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 2)
+
+    def test_flush_error_keeps_view(self):
+        """Ошибка БД при сбросе по порогу не ломает ответ и не теряет просмотры"""
+        url = reverse('post-view', kwargs={'pk': self.post.pk})
+        failing = patch('blog.view_buffer._apply_deltas', side_effect=OperationalError('locked'))
+        with self.settings(BLOG_VIEWS_FLUSH_THRESHOLD=1), failing:
+            with self.assertLogs('blog.view_buffer', 'ERROR'):
+                response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['views_count'], 1)
+        call_command('flush_views', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 1)
+
+    def assert_no_lost_views(self, buffer):
+        threads_count = 4
+        views_per_thread = 500
+
+        def add_views():
+            for _ in range(views_per_thread):
+                buffer.add(self.post.pk)
+
+        threads = [threading.Thread(target=add_views) for _ in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        # Сбрасываем буфер, пока другие потоки продолжают добавлять просмотры
+        while any(thread.is_alive() for thread in threads):
+            buffer.flush()
+        for thread in threads:
+            thread.join()
+        buffer.flush()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, threads_count * views_per_thread)
+        self.assertEqual(buffer.total(), 0)
+
+    def test_local_buffer_no_lost_views_across_flush(self):
+        """Тест сохранности просмотров при сбросе локального буфера"""
+        self.assert_no_lost_views(LocalViewBuffer())
+
+    def test_cache_buffer_no_lost_views_across_flush(self):
+        """Тест сохранности просмотров при сбросе буфера в кеше"""
+        self.assert_no_lost_views(CacheViewBuffer())
+
+    def test_cache_buffer_separate_alias(self):
+        """Буфер в кеше не зависит от вытеснения в кеше по умолчанию"""
+        buffer = CacheViewBuffer()
+        buffer.add(self.post.pk, 3)
+        cache.clear()
+
+        self.assertEqual(buffer.flush(), 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 3)
+
+    def test_cache_buffer_reports_evicted_keys(self):
+        """Вытесненный счетчик не считается нулем молча"""
+        buffer = CacheViewBuffer()
+        buffer.add(self.post.pk, 3)
+        caches['views'].delete(buffer._key(self.post.pk))
+
+        with self.assertLogs('blog.view_buffer', 'WARNING') as logs:
+            self.assertEqual(buffer.flush(), 0)
+        self.assertIn(str(self.post.pk), logs.output[0])
+
+
+@override_settings(BLOG_RESPONSE_CACHE_ENABLED=True)
+class ResponseCacheTest(APITestCase):
+    """Тесты версионированного кеша ответов"""
+
+    def setUp(self):
+        cache.clear()
+        caches['responses'].clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(
+            title='Test Post',
+            body='Test content',
+            author=self.user
+        )
+
+    def test_post_list_cached(self):
+        """Тест повторного чтения списка постов из кеша"""
+        url = reverse('post-list-create')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_separate_alias(self):
+        """Ответы хранятся в своем алиасе кеша, не в кеше по умолчанию"""
+        url = reverse('post-list-create')
+        self.client.get(url)
+        cache.clear()
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        caches['responses'].clear()
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+
+        response = self.client.get(url, {'page_size': 5})
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_like_invalidates_cache(self):
+        """Тест сброса кеша списка и деталей после лайка"""
+        list_url = reverse('post-list-create')
+        detail_url = reverse('post-detail', kwargs={'pk': self.post.pk})
+        self.client.get(list_url)
+        self.client.get(detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('post-like', kwargs={'pk': self.post.pk}))
+
+        response = self.client.get(list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['likes_count'], 1)
+        response = self.client.get(detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['likes_count'], 1)
+
+    def test_subpost_create_invalidates_post_detail(self):
+        """Тест сброса кеша деталей поста после создания под-поста"""
+        detail_url = reverse('post-detail', kwargs={'pk': self.post.pk})
+        self.client.get(detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('subpost-list-create'),
+                {'title': 'Sub Post', 'body': 'Sub content', 'post': self.post.pk},
+                format='json'
+            )
+
+        response = self.client.get(detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['subposts']), 1)
+
+    def test_cache_stats(self):
+        """Тест счетчиков попаданий и промахов"""
+        url = reverse('post-list-create')
+        self.client.get(url)
+        self.client.get(url)
+
+        stats_url = reverse('response-cache-stats')
+        response = self.client.get(stats_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(stats_url)
+        self.assertEqual(response.data['post-list']['hits'], 1)
+        self.assertEqual(response.data['post-list']['misses'], 1)
+
+
+class ConditionalRequestTest(APITestCase):
+    """Тесты ETag / Last-Modified"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.post = Post.objects.create(
+            title='Test Post',
+            body='Test content',
+            author=self.user
+        )
+        self.subpost = SubPost.objects.create(
+            title='Sub Post',
+            body='Sub content',
+            post=self.post
+        )
+        self.url = reverse('post-detail', kwargs={'pk': self.post.pk})
+
+    def test_post_not_modified(self):
+        """Тест ответа 304 при совпадающем ETag"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_post_if_modified_since_ignored(self):
+        """Лайк и удаление под-поста не дают устаревшего 304 по If-Modified-Since"""
+        since = http_date(time.time() + 3600)
+        self.client.get(self.url)
+
+        self.client.post(reverse('post-like', kwargs={'pk': self.post.pk}))
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['likes_count'], 1)
+
+        self.client.delete(reverse('subpost-detail', kwargs={'pk': self.subpost.pk}))
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['subposts'], [])
+
+    def test_post_etag_changes_on_like_and_subpost(self):
+        """Тест смены ETag после лайка и изменения под-поста"""
+        etag = self.client.get(self.url)['ETag']
+
+        self.client.post(reverse('post-like', kwargs={'pk': self.post.pk}))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        self.subpost.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_post_if_match(self):
+        """Тест оптимистичной блокировки через If-Match"""
+        etag = self.client.get(self.url)['ETag']
+        data = {'title': 'Updated Post', 'body': 'Updated content'}
+
+        response = self.client.put(self.url, data, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = self.client.put(self.url, data, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_subpost_not_modified(self):
+        """Тест ответа 304 для под-поста"""
+        url = reverse('subpost-detail', kwargs={'pk': self.subpost.pk})
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_post(self):
+        """Тест 404 для несуществующего поста"""
+        url = reverse('post-detail', kwargs={'pk': self.post.pk + 100})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['detail'], 'No Post matches the given query.')
+
+
+class SearchTest(APITestCase):
+    """Тесты полнотекстового поиска"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('post-search')
+
+    def search(self, query, **params):
+        response = self.client.get(self.url, {'q': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_search_by_title_body_and_subpost(self):
+        """Пост находится по заголовку, тексту и тексту под-поста"""
+        by_title = Post.objects.create(title='Django tips', body='Text', author=self.user)
+        by_body = Post.objects.create(title='Other', body='About django ORM', author=self.user)
+        by_subpost = Post.objects.create(title='Third', body='Text', author=self.user)
+        SubPost.objects.create(post=by_subpost, title='Sub', body='Django forms')
+        Post.objects.create(title='Unrelated', body='Flask', author=self.user)
+
+        data = self.search('django')
+        ids = {post['id'] for post in data['results']}
+        self.assertEqual(ids, {by_title.id, by_body.id, by_subpost.id})
+        self.assertIsNone(data['next'])
+        self.assertIn('liked_by_me', data['results'][0])
+
+    def test_ranking(self):
+        """Более релевантный пост выше"""
+        weak = Post.objects.create(
+            title='Notes', body='python ' + 'filler ' * 50, author=self.user
+        )
+        strong = Post.objects.create(title='Python', body='python python', author=self.user)
+
+        ids = [post['id'] for post in self.search('python')['results']]
+        self.assertEqual(ids, [strong.id, weak.id])
+
+    def test_keyset_pagination(self):
+        """Курсор next обходит все результаты без повторов"""
+        posts = [
+            Post.objects.create(title=f'Search {i}', body='keyword', author=self.user)
+            for i in range(5)
+        ]
+
+        data = self.search('keyword', page_size=2)
+        seen = [post['id'] for post in data['results']]
+        while data['next']:
+            response = self.client.get(data['next'])
+            data = response.data
+            seen.extend(post['id'] for post in data['results'])
+        self.assertEqual(sorted(seen), sorted(post.id for post in posts))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_index_follows_writes(self):
+        """Индекс обновляется при изменении, удалении и массовом создании"""
+        post = Post.objects.create(title='Before', body='Text', author=self.user)
+        self.assertEqual(len(self.search('before')['results']), 1)
+
+        Post.objects.filter(pk=post.pk).update(title='After')
+        self.assertEqual(self.search('before')['results'], [])
+        self.assertEqual(len(self.search('after')['results']), 1)
+
+        post.delete()
+        self.assertEqual(self.search('after')['results'], [])
+
+        self.client.post(reverse('post-bulk-create'), {
+            'posts': [{'title': 'Bulk', 'body': 'Imported', 'subposts': []}]
+        }, format='json')
+        self.assertEqual(len(self.search('imported')['results']), 1)
+
+    def test_invalid_params(self):
+        """Без q или с битым курсором — 400"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'q': 'x', 'cursor': 'broken'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_special_characters(self):
+        """Спецсимволы FTS в запросе не ломают поиск"""
+        Post.objects.create(title='C++ AND "quotes"', body='Text', author=self.user)
+        self.assertEqual(len(self.search('"quotes" AND (')['results']), 1)
+        self.assertEqual(self.search('*()')['results'], [])
+
+    def test_rebuild_command(self):
+        """Команда rebuild_search_index восстанавливает индекс"""
+        # Пост создается без индекса, команда строит индекс по содержимому таблиц
+        search.uninstall()
+        post = Post.objects.create(title='Indexed', body='Text', author=self.user)
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('indexed')['results'][0]['id'], post.id)
+
+
+class BenchCommandTest(TestCase):
+    """Тесты команды blog_bench"""
+
+    def test_bench_covers_all_routes(self):
+        """Все маршруты API прогоняются без ошибок, данные откатываются"""
+        out = StringIO()
+        call_command(
+            'blog_bench', users=3, posts=10, subposts=1, likes=2,
+            requests=3, warmup=0, stdout=out
+        )
+        report = json.loads(out.getvalue())
+
+        routes = {result['route'] for result in report['results']}
+        self.assertEqual(routes, {pattern.name for pattern in api_urls.urlpatterns})
+        for result in report['results']:
+            self.assertEqual(result['errors'], 0, result['scenario'])
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+    def test_bench_trending(self):
+        """Число запросов ленты не растет вместе с таблицей постов"""
+        out = StringIO()
+        call_command('bench_trending', sizes='10,100', requests=2, stdout=out)
+
+        rows = re.findall(r'^\s+(\d+)\s+[\d.]+\s+([\d.]+)', out.getvalue(), re.M)
+        self.assertEqual([size for size, _ in rows], ['10', '100'])
+        self.assertEqual(rows[0][1], rows[1][1])
+        self.assertFalse(Post.objects.exists())
+
+    def test_bench_connections(self):
+        """Постоянное соединение открывается один раз, а не на каждый запрос"""
+        out = StringIO()
+        call_command('bench_connections', requests=5, stdout=out)
+
+        connects = dict(re.findall(r'(per-request|persistent)\s+(\d+) соединений', out.getvalue()))
+        self.assertEqual(set(connects), {'per-request', 'persistent'})
+        self.assertEqual(connects['persistent'], '1')
+        # SQLite в памяти (тестовая БД) игнорирует close(), поэтому число новых
+        # соединений без CONN_MAX_AGE проверяется только для файловой БД
+        if not connection.is_in_memory_db():
+            self.assertEqual(connects['per-request'], '5')
+
+
+@override_settings(BLOG_REQUEST_TIMING_ENABLED=True)
+class RequestTimingTest(APITestCase):
+    """Тесты Server-Timing и лога blog.timing"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        for i in range(3):
+            post = Post.objects.create(title=f'Post {i}', body='Content', author=self.user)
+            SubPost.objects.create(post=post, title='Sub', body='Sub content')
+
+    def metrics(self, response):
+        metrics = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+        return metrics
+
+    def test_server_timing_header(self):
+        """Заголовок содержит SQL, сериализацию, рендеринг и общее время"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('post-list-create'))
+
+        metrics = self.metrics(response)
+        self.assertEqual(set(metrics), {'sql', 'serializer', 'render', 'total'})
+        self.assertEqual(metrics['sql']['desc'], f'"{len(queries)} queries"')
+        self.assertGreater(float(metrics['serializer']['dur']), 0)
+        self.assertGreater(float(metrics['render']['dur']), 0)
+        self.assertLessEqual(float(metrics['sql']['dur']), float(metrics['total']['dur']))
+
+    def test_serializer_time_on_drf_path(self):
+        """Время сериализатора учитывается и без быстрого пути"""
+        post = Post.objects.first()
+        response = self.client.get(reverse('post-detail', args=[post.id]))
+        self.assertGreater(float(self.metrics(response)['serializer']['dur']), 0)
+
+    def test_structured_log(self):
+        """Метрики пишутся в лог blog.timing полями записи"""
+        with self.assertLogs('blog.timing', level='INFO') as logs:
+            response = self.client.get(reverse('post-list-create'))
+
+        record = logs.records[0]
+        self.assertEqual(record.path, reverse('post-list-create'))
+        self.assertEqual(record.status, 200)
+        self.assertEqual(
+            f'"{record.queries} queries"', self.metrics(response)['sql']['desc']
+        )
+        self.assertIn('sql_ms=', record.getMessage())
+
+    @override_settings(BLOG_REQUEST_TIMING_ENABLED=False)
+    def test_disabled(self):
+        """Выключенный middleware не добавляет заголовок"""
+        response = self.client.get(reverse('post-list-create'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class RequestProfilerTest(APITestCase):
+    """Тесты профилирования запросов по заголовку X-Profile"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.profile_dir = Path(directory.name)
+        settings = override_settings(
+            BLOG_PROFILER_ENABLED=True, BLOG_PROFILER_DIR=self.profile_dir
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.staff = User.objects.create_user(
+            username='staff',
+            password='testpass123',
+            is_staff=True
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.post = Post.objects.create(title='Post', body='Content', author=self.user)
+        self.url = reverse('post-detail', args=[self.post.id])
+
+    def test_staff_profile_written(self):
+        """Запрос персонала с заголовком сохраняет .prof"""
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        path = self.profile_dir / response['X-Profile-File']
+        self.assertTrue(path.name.endswith('.prof'))
+        functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+        self.assertIn('to_representation', functions)
+
+    def test_not_profiled_without_permission(self):
+        """Без заголовка или не для персонала профиль не пишется"""
+        self.client.force_login(self.staff)
+        self.assertNotIn('X-Profile-File', self.client.get(self.url))
+
+        self.client.force_login(self.user)
+        self.assertNotIn('X-Profile-File', self.client.get(self.url, HTTP_X_PROFILE='1'))
+        self.assertEqual(list(self.profile_dir.iterdir()), [])
+
+    @override_settings(BLOG_PROFILER_STAFF_ONLY=False)
+    def test_allow_all_setting(self):
+        """BLOG_PROFILER_STAFF_ONLY = False разрешает профилирование всем"""
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+        self.assertIn('X-Profile-File', response)
+
+    def test_profiles_command(self):
+        """Команда blog_profiles выводит список и сводку"""
+        self.client.force_login(self.staff)
+        name = self.client.get(self.url, HTTP_X_PROFILE='1')['X-Profile-File']
+
+        out = StringIO()
+        call_command('blog_profiles', stdout=out)
+        self.assertIn(name, out.getvalue())
+
+        out = StringIO()
+        call_command('blog_profiles', name, limit=5, stdout=out)
+        self.assertIn('cumulative', out.getvalue())
+
+
+@skipUnless(
+    connection.vendor == 'sqlite' and 'replica' in connections,
+    'Нужна отдельная SQLite-база реплики: --settings=blog_project.settings_test'
+)
+@override_settings(BLOG_READ_REPLICA='replica', BLOG_REPLICA_STICKY_SECONDS=60)
+class ReadReplicaTest(APITestCase):
+    """Тесты чтения с реплики (вторая SQLite-база вместо настоящей реплики).
+
+    На PostgreSQL алиас replica в тестах — зеркало default, поэтому разные
+    данные в двух базах не создать.
+    """
+
+    # Базы из DATABASES проверяются и для пропущенных тестов
+    databases = {'default', 'replica'} & set(connections)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        # Одинаковые строки в обеих базах, но с разными заголовками
+        self.post = Post.objects.create(title='Primary', body='Content', author=self.user)
+        self.subpost = SubPost.objects.create(post=self.post, title='Primary sub', body='Sub')
+        User.objects.using('replica').create(pk=self.user.pk, username='testuser')
+        Post.objects.using('replica').create(
+            pk=self.post.pk, title='Replica', body='Content', author_id=self.user.pk
+        )
+        SubPost.objects.using('replica').create(
+            pk=self.subpost.pk, post_id=self.post.pk, title='Replica sub', body='Sub'
+        )
+
+    def test_safe_methods_read_from_replica(self):
+        """GET списков и деталей постов и под-постов читается с реплики"""
+        with CaptureQueriesContext(connections['default']) as primary:
+            post_list = self.client.get(reverse('post-list-create'))
+            post_detail = self.client.get(reverse('post-detail', args=[self.post.pk]))
+            subpost_list = self.client.get(reverse('subpost-list-create'))
+            subpost_detail = self.client.get(reverse('subpost-detail', args=[self.subpost.pk]))
+
+        self.assertEqual(post_list.data['results'][0]['title'], 'Replica')
+        self.assertEqual(post_detail.data['title'], 'Replica')
+        self.assertEqual(post_detail.data['subposts'][0]['title'], 'Replica sub')
+        self.assertEqual(subpost_list.data[0]['title'], 'Replica sub')
+        self.assertEqual(subpost_detail.data['title'], 'Replica sub')
+        self.assertEqual(len(primary), 0)
+
+    def test_stream_reads_from_replica(self):
+        """Ленивый NDJSON-ответ тоже читает с реплики"""
+        response = self.client.get(reverse('subpost-list-create'), {'stream': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(rows[0]['title'], 'Replica sub')
+
+    def test_write_goes_to_primary_and_pins_reads(self):
+        """Запись идет в default, после нее пользователь читает с default"""
+        response = self.client.patch(
+            reverse('post-detail', args=[self.post.pk]), {'title': 'Updated'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Post.objects.using('default').get(pk=self.post.pk).title, 'Updated')
+        self.assertEqual(Post.objects.using('replica').get(pk=self.post.pk).title, 'Replica')
+
+        response = self.client.get(reverse('post-detail', args=[self.post.pk]))
+        self.assertEqual(response.data['title'], 'Updated')
+
+        # Другой пользователь по-прежнему читает с реплики
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse('post-detail', args=[self.post.pk]))
+        self.assertEqual(response.data['title'], 'Replica')
+
+    def test_like_pins_reads(self):
+        """Функции-представления с записью тоже закрепляют primary"""
+        self.client.post(reverse('post-like', args=[self.post.pk]))
+        response = self.client.get(reverse('post-detail', args=[self.post.pk]))
+        self.assertEqual(response.data['likes_count'], 1)
+
+    @override_settings(BLOG_REPLICA_STICKY_SECONDS=0)
+    def test_pin_expires(self):
+        """После окна закрепления чтения снова идут на реплику"""
+        self.client.patch(
+            reverse('post-detail', args=[self.post.pk]), {'title': 'Updated'}, format='json'
+        )
+        response = self.client.get(reverse('post-detail', args=[self.post.pk]))
+        self.assertEqual(response.data['title'], 'Replica')
+
+    @override_settings(BLOG_READ_REPLICA=None)
+    def test_disabled(self):
+        """Без BLOG_READ_REPLICA все читается из default"""
+        response = self.client.get(reverse('post-detail', args=[self.post.pk]))
+        self.assertEqual(response.data['title'], 'Primary')
+
+    @override_settings(BLOG_READ_REPLICA='missing')
+    def test_unknown_alias_falls_back_to_default(self):
+        """Алиас реплики без записи в DATABASES не используется"""
+        response = self.client.get(reverse('post-detail', args=[self.post.pk]))
+        self.assertEqual(response.data['title'], 'Primary')
+
+
+class AsyncViewsTest(TestCase):
+    """Тесты async-представлений ASGI: ответы совпадают с синхронными DRF-представлениями.
+
+    AsyncClient создает ASGIRequest, поэтому его запросы идут по BLOG_ASGI_URLCONF.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.posts = []
+        for i in range(25):
+            post = Post.objects.create(title=f'Post {i}', body=f'Content {i}', author=self.user)
+            SubPost.objects.create(post=post, title=f'Sub {i}', body='Sub content')
+            self.posts.append(post)
+        Like.objects.create(post=self.posts[-1], user=self.user)
+        Post.objects.filter(pk=self.posts[-1].pk).update(likes_count=1)
+
+    def sync_get(self, path, **extra):
+        self.client.force_login(self.user)
+        return self.client.get(path, **extra)
+
+    async def test_asgi_requests_use_async_urlconf(self):
+        """ASGI-запросы попадают в async-представления, WSGI — в DRF"""
+        response = await self.async_client.get('/api/posts/')
+        self.assertIs(response.resolver_match.func, async_views.post_list)
+        response = await sync_to_async(self.client.get)('/api/posts/')
+        self.assertEqual(response.resolver_match.func.view_class, PostListCreateView)
+
+        with override_settings(BLOG_ASGI_URLCONF=None):
+            response = await self.async_client.get('/api/posts/')
+        self.assertEqual(response.resolver_match.func.view_class, PostListCreateView)
+
+    async def test_list_and_detail_match_sync(self):
+        """Список и детали совпадают с DRF, включая пагинацию и liked_by_me"""
+        await self.async_client.aforce_login(self.user)
+        paths = [
+            '/api/posts/',
+            '/api/posts/?page=2',
+            '/api/posts/?page=2&page_size=10',
+            '/api/posts/?page=last',
+            '/api/posts/?page=9',
+            f'/api/posts/{self.posts[-1].pk}/',
+            '/api/posts/999999/',
+        ]
+        for path in paths:
+            response = await self.async_client.get(path)
+            expected = await sync_to_async(self.sync_get)(path)
+            self.assertEqual(response.status_code, expected.status_code, path)
+            self.assertEqual(json.loads(response.content), json.loads(expected.content), path)
+            self.assertEqual(response.get('ETag'), expected.get('ETag'), path)
+
+    async def test_detail_not_modified(self):
+        """Совпадающий If-None-Match дает 304"""
+        path = f'/api/posts/{self.posts[0].pk}/'
+        etag = (await self.async_client.get(path))['ETag']
+        response = await self.async_client.get(path, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_view_post(self):
+        """Просмотр увеличивает счетчик через async ORM"""
+        post = self.posts[0]
+        response = await self.async_client.get(f'/api/posts/{post.pk}/view/')
+        self.assertEqual(json.loads(response.content), {'views_count': 1})
+        response = await self.async_client.get('/api/posts/999999/view/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_like_post(self):
+        """Лайк переключается, аноним получает 403, несуществующий пост — 404"""
+        path = f'/api/posts/{self.posts[0].pk}/like/'
+        response = await self.async_client.post(path)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(path)
+        self.assertEqual(json.loads(response.content), {'liked': True, 'likes_count': 1})
+        response = await self.async_client.post(path)
+        self.assertEqual(json.loads(response.content), {'liked': False, 'likes_count': 0})
+
+        for pk in (999999, 2 ** 64):
+            response = await self.async_client.post(f'/api/posts/{pk}/like/')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            self.assertEqual(
+                json.loads(response.content), {'detail': 'No Post matches the given query.'}
+            )
+        self.assertFalse(await Like.objects.filter(post_id=999999).aexists())
+
+    async def test_streams_are_async(self):
+        """Потоковые ответы под ASGI читаются порциями, а не собираются в список"""
+        await User.objects.filter(pk=self.user.pk).aupdate(is_staff=True)
+        await self.async_client.aforce_login(self.user)
+        for path in ('/api/subposts/?stream=ndjson', '/api/posts/export/?output=csv'):
+            expected = await sync_to_async(
+                lambda: b''.join(self.sync_get(path).streaming_content)
+            )()
+            with patch('blog.async_routing.STREAM_LINES_PER_CHUNK', 10):
+                response = await self.async_client.get(path)
+                self.assertTrue(response.is_async, path)
+                chunks = [chunk async for chunk in response.streaming_content]
+            self.assertEqual(b''.join(chunks), expected, path)
+            self.assertGreater(len(chunks), 2, path)
+
+    async def test_like_requires_csrf_for_session(self):
+        """Как и в DRF, сессионный лайк без CSRF-токена отклоняется"""
+        client = AsyncClient(enforce_csrf_checks=True)
+        await client.aforce_login(self.user)
+        response = await client.post(f'/api/posts/{self.posts[0].pk}/like/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_other_requests_delegated(self):
+        """Запись и параметры, которых нет в async-пути, обслуживает DRF"""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/api/posts/', {'fields': 'id'})
+        self.assertEqual(set(json.loads(response.content)['results'][0]), {'id'})
+
+        response = await self.async_client.post(
+            '/api/posts/', {'title': 'New', 'body': 'Body'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = await self.async_client.patch(
+            f'/api/posts/{self.posts[0].pk}/', {'title': 'Changed'},
+            content_type='application/json'
+        )
+        self.assertEqual(json.loads(response.content)['title'], 'Changed')
+
+
+class ImportPostsTest(TestCase):
+    """Тесты команды import_posts"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer', password='testpass123')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'posts.jsonl'
+
+    def write(self, *records):
+        self.path.write_text(
+            ''.join(
+                (record if isinstance(record, str) else json.dumps(record)) + '\n'
+                for record in records
+            ),
+            encoding='utf-8'
+        )
+
+    def record(self, i, subposts=1):
+        return {
+            'title': f'Imported {i}',
+            'body': f'Body {i}',
+            'author': 'importer',
+            'subposts': [{'title': f'Sub {i}.{j}', 'body': 'Text'} for j in range(subposts)],
+        }
+
+    def run_import(self, **options):
+        out = StringIO()
+        call_command('import_posts', str(self.path), stdout=out, stderr=StringIO(), **options)
+        return out.getvalue()
+
+    def test_import_in_batches(self):
+        """Посты и под-посты вставляются пакетами и попадают в поисковый индекс"""
+        self.write(*(self.record(i, subposts=2) for i in range(4)), {
+            'title': 'Unique zeppelin', 'body': 'Text', 'author': 'importer'
+        })
+
+        output = self.run_import(batch_size=2)
+
+        self.assertEqual(output.count('постов/с'), 3)
+        posts = Post.objects.order_by('pk')
+        self.assertEqual(
+            [post.title for post in posts],
+            ['Imported 0', 'Imported 1', 'Imported 2', 'Imported 3', 'Unique zeppelin']
+        )
+        self.assertEqual(SubPost.objects.count(), 8)
+        self.assertEqual(
+            list(posts[1].subposts.values_list('title', flat=True)), ['Sub 1.0', 'Sub 1.1']
+        )
+        self.assertEqual(posts[0].author, self.user)
+        self.assertEqual(AuthorStats.objects.get(user=self.user).posts_count, 5)
+        # Триггеры полнотекстового индекса срабатывают и на пакетных вставках
+        response = self.client.get(reverse('post-search'), {'q': 'zeppelin'})
+        self.assertEqual([post['title'] for post in response.json()['results']], ['Unique zeppelin'])
+
+    def test_resume_after_invalid_record(self):
+        """После исправления файла импорт продолжается без дублей"""
+        self.write(self.record(0), self.record(1), self.record(2), '{"title": broken', self.record(4))
+
+        with self.assertRaisesMessage(CommandError, 'Строка 4'):
+            self.run_import(batch_size=2)
+        self.assertEqual(Post.objects.count(), 2)
+        checkpoint = ImportCheckpoint.objects.get()
+        self.assertEqual((checkpoint.line, checkpoint.posts), (2, 2))
+
+        self.write(self.record(0), self.record(1), self.record(2), self.record(3), self.record(4))
+        output = self.run_import(batch_size=2)
+
+        self.assertIn('Продолжаем со строки 3', output)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('title', flat=True)),
+            [f'Imported {i}' for i in range(5)]
+        )
+        self.assertEqual(SubPost.objects.count(), 5)
+
+        # Повторный запуск по тому же файлу ничего не добавляет, --restart начинает заново
+        self.run_import()
+        self.assertEqual(Post.objects.count(), 5)
+        self.run_import(restart=True)
+        self.assertEqual(Post.objects.count(), 10)
+
+    def test_skip_invalid(self):
+        """С --skip-invalid некорректные записи пропускаются и учитываются"""
+        self.write(
+            self.record(0),
+            {'title': '', 'body': 'Text', 'author': 'importer'},
+            {'title': 'x' * 201, 'body': 'Text', 'author': 'importer'},
+            {'title': 'No author', 'body': 'Text'},
+            {'title': 'Bad subposts', 'body': 'Text', 'author': 'importer', 'subposts': 'x'},
+            self.record(1),
+        )
+
+        output = self.run_import(skip_invalid=True)
+
+        self.assertIn('пропущено 4', output)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get().skipped, 4)
+
+    def test_default_and_unknown_author(self):
+        """--author подставляется для записей без автора, неизвестный автор — ошибка"""
+        self.write({'title': 'No author', 'body': 'Text'})
+        self.run_import(author='importer')
+        self.assertEqual(Post.objects.get().author, self.user)
+
+        self.write({'title': 'Ghost', 'body': 'Text', 'author': 'ghost'})
+        with self.assertRaisesMessage(CommandError, 'пользователь не найден: ghost'):
+            self.run_import(restart=True)
+        self.assertEqual(Post.objects.count(), 1)
+
+
+class ExportTest(APITestCase):
+    """Тесты потоковой выгрузки постов"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='testpass123', is_staff=True
+        )
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', body=f'Body {i}', author=self.admin)
+            for i in range(5)
+        ]
+        for post in self.posts[:3]:
+            SubPost.objects.create(post=post, title='First', body='Text')
+            SubPost.objects.create(post=post, title='Second', body='Text, "quoted"\nline')
+        Post.objects.filter(pk=self.posts[1].pk).update(likes_count=7)
+        self.url = reverse('post-export')
+
+    def export(self, **params):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        """NDJSON: пост на строку с под-постами и счетчиком лайков"""
+        response, content = self.export()
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('posts.ndjson', response['Content-Disposition'])
+        posts = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([post['id'] for post in posts], [post.pk for post in self.posts])
+        self.assertEqual(posts[1]['likes_count'], 7)
+        self.assertEqual(posts[0]['author']['username'], 'admin')
+        self.assertEqual([sub['title'] for sub in posts[2]['subposts']], ['First', 'Second'])
+        self.assertEqual(posts[4]['subposts'], [])
+
+    def test_ndjson_matches_api_format(self):
+        """Пост выгрузки — пост API без зависящего от пользователя liked_by_me"""
+        _, content = self.export()
+        exported = [json.loads(line) for line in content.splitlines()]
+
+        expected = serialize_posts(post_values(Post.objects.order_by('id')))
+        for post in expected:
+            del post['liked_by_me']
+        self.assertEqual(exported, json.loads(JSONRenderer().render(expected)))
+
+    def test_csv(self):
+        """CSV: заголовок и строка на пост, под-посты в JSON-колонке"""
+        response, content = self.export(output='csv')
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1]['likes_count'], '7')
+        subposts = json.loads(rows[0]['subposts'])
+        self.assertEqual(subposts[1]['body'], 'Text, "quoted"\nline')
+
+    def test_admin_only_and_invalid_format(self):
+        """Выгрузка доступна только персоналу, неизвестный формат — 400"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(self.url, {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_keyset_and_merged_iterators_match(self):
+        """Порции SQLite и слияние курсоров PostgreSQL дают одинаковый результат"""
+        with CaptureQueriesContext(connection) as captured:
+            keyset = list(export.iter_posts_keyset(chunk_size=2))
+        # Три порции постов с под-постами и пустая завершающая порция
+        self.assertEqual(len(captured), 7)
+        self.assertEqual(keyset, list(export.iter_posts_merged(chunk_size=2)))
+        self.assertEqual(keyset, list(export.iter_posts_keyset(chunk_size=100)))
+
+    def test_export_command(self):
+        """Команда export_posts пишет выгрузку в файл"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'posts.csv'
+            err = StringIO()
+            call_command('export_posts', format='csv', output=str(path), stderr=err)
+            rows = list(csv.DictReader(path.open(encoding='utf-8', newline='')))
+
+        self.assertEqual([int(row['id']) for row in rows], [post.pk for post in self.posts])
+        self.assertIn('Выгружено 5 постов', err.getvalue())
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Профиль производительности только для SQLite')
+@override_settings(BLOG_SQLITE_PERFORMANCE=True, BLOG_DB_LOCK_BACKOFF=0.001)
+class SQLitePerformanceTest(TestCase):
+    """Тесты профиля производительности SQLite и повторов при блокировке"""
+
+    alias = 'sqlite_stress'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # Отдельная файловая БД: у тестовой БД в памяти нет WAL и busy_timeout
+        self.settings_dict = {
+            **connections['default'].settings_dict,
+            'NAME': str(Path(directory.name) / 'stress.sqlite3'),
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+        }
+        self.connect()
+        self.addCleanup(self.disconnect)
+
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('CREATE TABLE counter (id INTEGER PRIMARY KEY, n INTEGER NOT NULL)')
+            cursor.execute('INSERT INTO counter VALUES (1, 0)')
+
+    def connect(self):
+        """Соединение текущего потока с файловой БД под отдельным алиасом"""
+        backend = load_backend(self.settings_dict['ENGINE'])
+        connections[self.alias] = backend.DatabaseWrapper(self.settings_dict, self.alias)
+
+    def disconnect(self):
+        connections[self.alias].close()
+        del connections[self.alias]
+
+    def pragma(self, name):
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_on_new_connection(self):
+        """Обработчик connection_created включает WAL и остальные PRAGMA"""
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -64 * 1024)
+
+    @override_settings(BLOG_SQLITE_PERFORMANCE=False)
+    def test_disabled_by_default(self):
+        """Без профиля новое соединение не меняет режим журнала"""
+        with tempfile.TemporaryDirectory() as directory:
+            self.disconnect()
+            self.settings_dict['NAME'] = str(Path(directory) / 'plain.sqlite3')
+            self.connect()
+            self.assertEqual(self.pragma('journal_mode'), 'delete')
+
+    def test_concurrent_writers(self):
+        """Параллельные транзакции чтения и записи проходят без "database is locked" """
+        threads_count, increments = 8, 25
+        errors = []
+
+        @retry_on_lock(using=self.alias)
+        def increment():
+            with transaction.atomic(using=self.alias):
+                with connections[self.alias].cursor() as cursor:
+                    cursor.execute('SELECT n FROM counter WHERE id = 1')
+                    value = cursor.fetchone()[0]
+                    cursor.execute('UPDATE counter SET n = %s WHERE id = 1', [value + 1])
+
+        def worker():
+            self.connect()
+            try:
+                for _ in range(increments):
+                    increment()
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                self.disconnect()
+
+        threads = [threading.Thread(target=worker) for _ in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('SELECT n FROM counter WHERE id = 1')
+            self.assertEqual(cursor.fetchone()[0], threads_count * increments)
+
+    @override_settings(BLOG_DB_LOCK_RETRIES=2)
+    def test_retries_are_bounded(self):
+        """Ошибка блокировки повторяется ограниченно, другие ошибки — нет"""
+        calls = []
+
+        @retry_on_lock(using=self.alias)
+        def fail(message):
+            calls.append(message)
+            raise OperationalError(message)
+
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            fail('database is locked')
+        self.assertEqual(len(calls), 3)
+
+        calls.clear()
+        with self.assertRaises(OperationalError):
+            fail('no such table: missing')
+        self.assertEqual(len(calls), 1)
+
+        # Внутри внешней транзакции повтор не поможет
+        calls.clear()
+        with self.assertRaises(OperationalError), transaction.atomic(using=self.alias):
+            fail('database is locked')
+        self.assertEqual(len(calls), 1)
+
+
+class TrendingTest(APITestCase):
+    """Тесты рейтинга популярных постов"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.posts = [
+            Post.objects.create(title=f'Post {i}', body=f'Content {i}', author=self.user)
+            for i in range(3)
+        ]
+        self.url = reverse('post-trending')
+
+    def trending_ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post['id'] for post in response.data['results']]
+
+    def test_scores_follow_like_and_view_events(self):
+        """Лайк и просмотр пересчитывают рейтинг поста без полного прохода"""
+        first, second, third = self.posts
+        self.assertEqual(self.trending_ids(), [])
+
+        self.client.post(reverse('post-like', kwargs={'pk': second.pk}))
+        for _ in range(3):
+            self.client.get(reverse('post-view', kwargs={'pk': first.pk}))
+        self.assertEqual(self.trending_ids(), [second.pk, first.pk])
+
+        second.refresh_from_db()
+        expected = math.log10(10) + second.created_at.timestamp() / 45000
+        self.assertAlmostEqual(TrendingScore.objects.get(post=second).score, expected, places=6)
+
+        # 12 просмотров перевешивают один лайк
+        for _ in range(9):
+            self.client.get(reverse('post-view', kwargs={'pk': first.pk}))
+        self.assertEqual(self.trending_ids(), [first.pk, second.pk])
+        self.assertFalse(TrendingScore.objects.filter(post=third).exists())
+
+    def test_time_decay(self):
+        """Более старому посту нужно в 10 раз больше очков"""
+        old, new, _ = self.posts
+        Post.objects.filter(pk=old.pk).update(
+            created_at=new.created_at - timedelta(seconds=45000 * 2), likes_count=50
+        )
+        Post.objects.filter(pk=new.pk).update(likes_count=1)
+        trending.refresh_scores([old.pk, new.pk])
+        self.assertEqual(self.trending_ids(), [new.pk, old.pk])
+
+        Post.objects.filter(pk=old.pk).update(likes_count=200)
+        trending.refresh_scores([old.pk])
+        self.assertEqual(self.trending_ids(), [old.pk, new.pk])
+
+    @override_settings(BLOG_VIEWS_BUFFERED=True, BLOG_VIEWS_FLUSH_INTERVAL=3600)
+    def test_buffered_views_update_on_flush(self):
+        """При буферизованных просмотрах рейтинг обновляется при сбросе буфера"""
+        call_command('flush_views', stdout=StringIO())
+        self.client.get(reverse('post-view', kwargs={'pk': self.posts[0].pk}))
+        self.assertEqual(self.trending_ids(), [])
+
+        call_command('flush_views', stdout=StringIO())
+        self.assertEqual(self.trending_ids(), [self.posts[0].pk])
+
+    def test_cursor_pagination_queries_do_not_grow(self):
+        """Курсорная пагинация без пропусков; число запросов не зависит от размера таблицы"""
+        more = Post.objects.bulk_create(
+            Post(title=f'More {i}', body='Content', author=self.user, views_count=i + 1)
+            for i in range(20)
+        )
+        ids = [post.pk for post in Post.objects.filter(title__startswith='More')]
+        trending.refresh_scores(ids)
+
+        seen, params = [], {'page_size': 6}
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url, params)
+        first_page_queries = len(captured)
+        while True:
+            seen += [post['id'] for post in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(seen), len(more))
+        self.assertEqual(set(seen), set(ids))
+
+        Post.objects.bulk_create(
+            Post(title='Extra', body='Content', author=self.user, views_count=1)
+            for _ in range(50)
+        )
+        trending.refresh_scores(Post.objects.values_list('pk', flat=True))
+        with self.assertNumQueries(first_page_queries):
+            self.client.get(self.url, params)
+
+    def test_invalid_cursor(self):
+        """Некорректный курсор или курсор со значениями вне диапазона БД — 400"""
+        cursors = ['broken'] + [
+            urlsafe_b64encode(json.dumps(value).encode()).decode()
+            for value in ([1.0, 10**20], [1.0, 0], [float('inf'), 1])
+        ]
+        for url, params in ((self.url, {}), (reverse('post-search'), {'q': 'post'})):
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    response = self.client.get(url, {**params, 'cursor': cursor})
+                    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_migration_backfill(self):
+        """Миграция заполняет рейтинг постов с активностью по той же формуле"""
+        migration = import_module('blog.migrations.0006_trending_score')
+        Post.objects.filter(pk=self.posts[0].pk).update(likes_count=2, views_count=7)
+        Post.objects.filter(pk=self.posts[1].pk).update(views_count=1)
+
+        migration.fill_trending_scores(django_apps, None)
+        scores = dict(TrendingScore.objects.values_list('post_id', 'score'))
+        self.assertEqual(set(scores), {self.posts[0].pk, self.posts[1].pk})
+
+        trending.refresh_scores(scores)
+        for post_id, score in TrendingScore.objects.values_list('post_id', 'score'):
+            self.assertAlmostEqual(score, scores[post_id], places=6)
+
+    def test_refresh_command(self):
+        """refresh_trending добавляет посты с активностью и убирает посты без нее"""
+        Post.objects.filter(pk=self.posts[0].pk).update(views_count=5)
+        TrendingScore.objects.create(post=self.posts[1], score=100)
+
+        out = StringIO()
+        call_command('refresh_trending', batch_size=2, stdout=out)
+
+        self.assertIn('1 постов', out.getvalue())
+        self.assertEqual(self.trending_ids(), [self.posts[0].pk])
+
+
+class AuthorStatsTest(APITestCase):
+    """Тесты материализованной статистики авторов"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', password='testpass123')
+        self.reader = User.objects.create_user(username='reader', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('author-stats', kwargs={'pk': self.user.pk})
+
+    def stats(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [response.data[name] for name in ('posts_count', 'views_count', 'likes_count')]
+
+    def test_write_paths_maintain_stats(self):
+        """Создание, массовое создание, лайк, просмотр и удаление меняют строку автора"""
+        self.assertEqual(self.stats(), [0, 0, 0])
+
+        response = self.client.post(
+            reverse('post-list-create'), {'title': 'Post', 'body': 'Body'}, format='json'
+        )
+        post_id = response.data['id']
+        self.client.post(
+            reverse('post-bulk-create'),
+            {'posts': [{'title': f'Bulk {i}', 'body': 'Body'} for i in range(3)]},
+            format='json'
+        )
+        self.assertEqual(self.stats(), [4, 0, 0])
+
+        for _ in range(2):
+            self.client.get(reverse('post-view', kwargs={'pk': post_id}))
+        self.client.force_authenticate(user=self.reader)
+        self.client.post(reverse('post-like', kwargs={'pk': post_id}))
+        self.assertEqual(self.stats(), [4, 2, 1])
+
+        self.client.post(reverse('post-like', kwargs={'pk': post_id}))
+        self.client.post(reverse('post-like', kwargs={'pk': post_id}))
+        self.client.force_authenticate(user=self.user)
+        self.client.delete(reverse('post-detail', kwargs={'pk': post_id}))
+        self.assertEqual(self.stats(), [3, 0, 0])
+
+        # Лайк чужого поста не меняет статистику того, кто лайкает
+        self.assertEqual(AuthorStats.objects.filter(user=self.reader).count(), 0)
+
+    @override_settings(BLOG_VIEWS_BUFFERED=True, BLOG_VIEWS_FLUSH_INTERVAL=3600)
+    def test_buffered_views(self):
+        """Буферизованные просмотры попадают в статистику при сбросе буфера"""
+        call_command('flush_views', stdout=StringIO())
+        post = Post.objects.create(title='Post', body='Body', author=self.user)
+        for _ in range(3):
+            self.client.get(reverse('post-view', kwargs={'pk': post.pk}))
+
+        call_command('flush_views', stdout=StringIO())
+        self.assertEqual(self.stats()[1], 3)
+
+    def test_endpoint_single_query(self):
+        """Эндпойнт читает одну строку; несуществующий автор — 404"""
+        AuthorStats.objects.create(user=self.user, posts_count=5, views_count=70, likes_count=9)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data, {
+            'author': {'id': self.user.pk, 'username': 'author'},
+            'posts_count': 5,
+            'views_count': 70,
+            'likes_count': 9,
+        })
+
+        response = self.client.get(reverse('author-stats', kwargs={'pk': 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_reconcile_command(self):
+        """reconcile_author_stats исправляет расхождения и удаляет лишние строки"""
+        Post.objects.bulk_create([
+            Post(title='A', body='Body', author=self.user, views_count=10, likes_count=2),
+            Post(title='B', body='Body', author=self.user, views_count=5, likes_count=1),
+        ])
+        AuthorStats.objects.create(user=self.reader, posts_count=3)
+
+        out = StringIO()
+        call_command('reconcile_author_stats', dry_run=True, stdout=out)
+        self.assertIn('Найдено строк статистики авторов: 2', out.getvalue())
+        self.assertEqual(self.stats(), [0, 0, 0])
+
+        call_command('reconcile_author_stats', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.stats(), [2, 15, 3])
+        self.assertFalse(AuthorStats.objects.filter(user=self.reader).exists())
+
+        out = StringIO()
+        call_command('reconcile_author_stats', stdout=out)
+        self.assertIn('Исправлено строк статистики авторов: 0', out.getvalue())
+
+
+class PostBulkWriteTest(APITestCase):
+    """Тесты массового изменения и удаления постов"""
+
+    def setUp(self):
+        cache.clear()
+        caches['responses'].clear()
+        self.user = User.objects.create_user(username='author', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('post-bulk-create')
+
+    def create_posts(self, author, count, subposts=2):
+        posts = Post.objects.bulk_create([
+            Post(title=f'Post {i}', body='Body', author=author, views_count=3, likes_count=1)
+            for i in range(count)
+        ])
+        SubPost.objects.bulk_create([
+            SubPost(post=post, title=f'Sub {i}', body='Body')
+            for post in posts for i in range(subposts)
+        ])
+        Like.objects.bulk_create([Like(post=post, user=self.other) for post in posts])
+        trending.refresh_scores([post.pk for post in posts])
+        call_command('reconcile_author_stats', stdout=StringIO())
+        return [post.pk for post in posts]
+
+    def test_delete_by_ids(self):
+        """Удаление по ids убирает посты со связанными строками и статистикой"""
+        ids = self.create_posts(self.user, 3)
+        kept = Post.objects.create(title='Kept', body='Body', author=self.user)
+
+        response = self.client.delete(self.url, {'ids': ids + [999999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'posts': 3, 'subposts': 6, 'likes': 3})
+
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)), [kept.pk])
+        self.assertFalse(SubPost.objects.exists())
+        self.assertFalse(Like.objects.exists())
+        self.assertFalse(TrendingScore.objects.exists())
+        stats = AuthorStats.objects.get(user=self.user)
+        self.assertEqual((stats.posts_count, stats.views_count, stats.likes_count), (0, 0, 0))
+        # Поисковый индекс обновляется триггерами
+        response = self.client.get(reverse('post-search'), {'q': 'post'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_delete_queries_do_not_grow(self):
+        """Число запросов не зависит от числа постов, под-постов и лайков"""
+        small = self.create_posts(self.user, 2, subposts=1)
+        large = self.create_posts(self.user, 20, subposts=5)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            self.client.delete(self.url, {'ids': small}, format='json')
+        with CaptureQueriesContext(connection) as large_queries:
+            response = self.client.delete(self.url, {'ids': large}, format='json')
+        self.assertEqual(response.data['subposts'], 100)
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertFalse(
+            any(query['sql'].startswith('SELECT') for query in large_queries.captured_queries[1:])
+        )
+
+    @override_settings(BLOG_BULK_WRITE_BATCH_SIZE=2)
+    def test_update_by_filter(self):
+        """Изменение по фильтру затрагивает только подходящие посты"""
+        ids = self.create_posts(self.user, 5, subposts=0)
+        self.create_posts(self.other, 2, subposts=0)
+        before = Post.objects.get(pk=ids[0]).updated_at
+
+        response = self.client.patch(
+            self.url,
+            {'filter': {'author': self.user.pk, 'title_contains': 'post'},
+             'values': {'title': 'Hidden by moderator'}},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'posts': 5})
+        self.assertEqual(Post.objects.filter(title='Hidden by moderator').count(), 5)
+        self.assertEqual(Post.objects.filter(author=self.other, title__startswith='Post').count(), 2)
+        self.assertGreater(Post.objects.get(pk=ids[0]).updated_at, before)
+
+        response = self.client.get(reverse('post-search'), {'q': 'moderator'})
+        self.assertEqual(len(response.data['results']), 5)
+
+    @override_settings(BLOG_RESPONSE_CACHE_ENABLED=True)
+    def test_update_invalidates_cache(self):
+        """Изменение сбрасывает кеш деталей постов"""
+        post_id = self.create_posts(self.user, 1, subposts=0)[0]
+        url = reverse('post-detail', kwargs={'pk': post_id})
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                self.url, {'ids': [post_id], 'values': {'body': 'New'}}, format='json'
+            )
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['body'], 'New')
+
+    def test_ownership(self):
+        """Чужие посты отклоняют запрос целиком; персоналу доступны все посты"""
+        own = self.create_posts(self.user, 1, subposts=0)
+        foreign = self.create_posts(self.other, 2, subposts=0)
+
+        response = self.client.delete(self.url, {'ids': own + foreign}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['forbidden_ids'], foreign)
+        self.assertEqual(Post.objects.count(), 3)
+
+        response = self.client.delete(
+            self.url, {'filter': {'author': self.other.pk}}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.delete(
+            self.url, {'filter': {'author': self.other.pk}}, format='json'
+        )
+        self.assertEqual(response.data['posts'], 2)
+
+        self.client.force_authenticate(user=None)
+        response = self.client.delete(self.url, {'ids': own}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Post.objects.count(), 1)
+
+    @override_settings(BLOG_BULK_MAX_POSTS=2)
+    def test_validation(self):
+        """Нужен ровно один из ids и filter, непустые фильтр и значения, предел постов"""
+        self.create_posts(self.user, 3, subposts=0)
+        invalid = [
+            ('delete', {}),
+            ('delete', {'ids': [1], 'filter': {'author': self.user.pk}}),
+            ('delete', {'ids': []}),
+            ('delete', {'filter': {}}),
+            ('delete', {'ids': [1, 2, 3]}),
+            ('delete', {'ids': [2**63]}),
+            ('delete', {'filter': {'author': 2**63}}),
+            ('patch', {'ids': [2**64], 'values': {'title': 'Title'}}),
+            ('delete', {'filter': {'author': self.user.pk}}),
+            ('patch', {'ids': [1]}),
+            ('patch', {'ids': [1], 'values': {}}),
+        ]
+        for method, data in invalid:
+            with self.subTest(method=method, data=data):
+                response = getattr(self.client, method)(self.url, data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Post.objects.count(), 3)
+
+    def test_cascade_models_covered(self):
+        """Прямое удаление учитывает все модели, ссылающиеся на пост"""
+        related = {relation.related_model for relation in Post._meta.related_objects}
+        self.assertEqual(related, {Like, SubPost, TrendingScore})
+
+
 class SubPostAPITest(APITestCase):
     """Тесты API для под-постов"""
 
@@ -394,6 +2322,26 @@ class SubPostAPITest(APITestCase):
             # Для пагинированного ответа
             self.assertEqual(len(response.data['results']), 2)
 
+    def test_list_subposts_ndjson_stream(self):
+        """Тест потоковой выдачи списка под-постов в NDJSON"""
+        for i in range(3):
+            SubPost.objects.create(
+                title=f'Sub Post {i}',
+                body=f'Sub content {i}',
+                post=self.post
+            )
+
+        url = reverse('subpost-list-create')
+        expected = self.client.get(url).json()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'stream': 'ndjson'})
+            body = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in body.splitlines()], expected)
+
     def test_update_subpost(self):
         """Тест обновления под-поста"""
         subpost = SubPost.objects.create(
@@ -0,0 +1,139 @@
+"""Замер времени запроса: SQL, сериализация и рендеринг.
+
+Метрики отдаются в заголовке ``Server-Timing`` и пишутся в лог ``blog.timing``.
+Запросы к БД считаются через ``connection.execute_wrapper``, поэтому замер
+работает и при ``DEBUG = False``. При ``BLOG_REQUEST_TIMING_ENABLED = False``
+middleware исключается из цепочки и не добавляет накладных расходов.
+"""
+
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("blog.timing")
+
+_current = ContextVar("blog_request_timings", default=None)
+
+
+class RequestTimings:
+    """Накопленные метрики одного запроса (время в секундах)"""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.serializer = 0.0
+        self.render = 0.0
+        self.open_sections = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обертка для connection.execute_wrapper"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - started
+            self.queries += 1
+
+    def as_dict(self, total):
+        return {
+            "queries": self.queries,
+            "sql_ms": round(self.sql * 1000, 3),
+            "serializer_ms": round(self.serializer * 1000, 3),
+            "render_ms": round(self.render * 1000, 3),
+            "total_ms": round(total * 1000, 3),
+        }
+
+    def server_timing(self, total):
+        return ", ".join(
+            (
+                f'sql;dur={self.sql * 1000:.3f};desc="{self.queries} queries"',
+                f"serializer;dur={self.serializer * 1000:.3f}",
+                f"render;dur={self.render * 1000:.3f}",
+                f"total;dur={total * 1000:.3f}",
+            )
+        )
+
+
+@contextmanager
+def section(name):
+    """Добавить время блока к метрике текущего запроса (например, serializer).
+
+    Вложенные блоки с тем же именем не учитываются повторно.
+    """
+    timings = _current.get()
+    if timings is None or name in timings.open_sections:
+        yield
+        return
+
+    timings.open_sections.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.open_sections.discard(name)
+        setattr(timings, name, getattr(timings, name) + time.perf_counter() - started)
+
+
+class TimedSerializerMixin:
+    """Учитывает время to_representation в метрике serializer"""
+
+    def to_representation(self, instance):
+        if _current.get() is None:
+            return super().to_representation(instance)
+        with section("serializer"):
+            return super().to_representation(instance)
+
+
+class RequestTimingMiddleware:
+    """Server-Timing и структурированный лог с метриками запроса"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "BLOG_REQUEST_TIMING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        response["Server-Timing"] = timings.server_timing(total)
+        metrics = timings.as_dict(total)
+        logger.info(
+            "request_timing method=%s path=%s status=%s %s",
+            request.method,
+            request.path,
+            response.status_code,
+            " ".join(f"{key}={value}" for key, value in metrics.items()),
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                **metrics,
+            },
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        """Рендеринг DRF Response происходит после представления — замеряем его отдельно"""
+        timings = _current.get()
+        started = time.perf_counter()
+
+        def rendered(response):
+            timings.render += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,64 @@
+"""Рейтинг популярных постов для ``GET /api/posts/trending/``.
+
+Формула в духе «hot»-ранжирования::
+
+    score = log10(max(points, 1)) + created_at / BLOG_TRENDING_DECAY_SECONDS
+    points = likes_count * BLOG_TRENDING_LIKE_WEIGHT + views_count * BLOG_TRENDING_VIEW_WEIGHT
+
+Затухание по времени заложено в слагаемое с датой создания: пост, созданный
+на ``BLOG_TRENDING_DECAY_SECONDS`` раньше, должен набрать в 10 раз больше
+очков, чтобы стоять рядом с новым. Значение зависит только от счетчиков
+самого поста, поэтому при лайке или просмотре пересчитывается одна строка
+``TrendingScore``, а остальные не устаревают со временем. Строка появляется
+при первом лайке или просмотре поста. Полный пересчет (после смены весов и для
+постов, созданных до появления рейтинга) — ``manage.py refresh_trending``.
+"""
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .locking import retry_on_lock
+from .models import Post, TrendingScore
+
+# Секунды Unix-времени created_at
+EPOCH_SQL = {
+    "sqlite": "(julianday(p.created_at) - 2440587.5) * 86400.0",
+    "postgresql": "EXTRACT(EPOCH FROM p.created_at)",
+}
+
+
+@retry_on_lock
+def refresh_scores(post_ids):
+    """Пересчитать рейтинг постов одним INSERT ... SELECT ... ON CONFLICT, вернуть число строк.
+
+    Счетчики читаются самой БД в той же инструкции, поэтому лайк и просмотр
+    не добавляют отдельного SELECT.
+    """
+    post_ids = list(post_ids)
+    if not post_ids:
+        return 0
+    qn = connection.ops.quote_name
+    points = "(p.likes_count * %s + p.views_count * %s)"
+    weights = [
+        getattr(settings, "BLOG_TRENDING_LIKE_WEIGHT", 10),
+        getattr(settings, "BLOG_TRENDING_VIEW_WEIGHT", 1),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(TrendingScore._meta.db_table)} (post_id, score, updated_at) "
+            f"SELECT p.id, LOG(10, CASE WHEN {points} > 1 THEN {points} ELSE 1 END) "
+            f"+ {EPOCH_SQL[connection.vendor]} / %s, %s "
+            f"FROM {qn(Post._meta.db_table)} p "
+            f"WHERE p.id IN ({', '.join(['%s'] * len(post_ids))}) "
+            "ON CONFLICT (post_id) DO UPDATE "
+            "SET score = excluded.score, updated_at = excluded.updated_at",
+            [
+                *weights,
+                *weights,
+                getattr(settings, "BLOG_TRENDING_DECAY_SECONDS", 45000),
+                connection.ops.adapt_datetimefield_value(timezone.now()),
+                *post_ids,
+            ],
+        )
+        return cursor.rowcount
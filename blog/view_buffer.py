@@ -0,0 +1,207 @@
+"""Буферизованный (write-behind) счетчик просмотров постов.
+
+Просмотры накапливаются в буфере и переносятся в ``Post.views_count``
+одним UPDATE на пост по порогу количества, по времени или командой
+``manage.py flush_views``.
+
+Буфер ``cache`` хранит счетчики в отдельном алиасе кеша
+``BLOG_VIEWS_CACHE_ALIAS``: вытеснение ключа означает потерю просмотров, поэтому
+этот кеш не должен вытеснять записи и делиться с кешем ответов. Для нескольких
+процессов нужен общий бэкенд (Redis, Memcached без вытеснения, БД); locmem
+подходит только для одного процесса.
+
+Сброс по времени проверяется только при следующем просмотре, а буфер ``local``
+при остановке процесса не сбрасывается: незаписанные просмотры теряются.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+
+from . import author_stats, trending
+from .locking import retry_on_lock
+from .models import Post
+
+logger = logging.getLogger("blog.view_buffer")
+
+
+@retry_on_lock
+def _apply_deltas(deltas):
+    """Записать накопленные просмотры в БД, вернуть их общее количество"""
+    with transaction.atomic():
+        # Сортировка по pk дает одинаковый порядок блокировок строк у всех процессов
+        for pk, delta in sorted(deltas.items()):
+            Post.objects.filter(pk=pk).update(views_count=F("views_count") + delta)
+            author_stats.add_post_deltas(pk, views=delta)
+        trending.refresh_scores(list(deltas))
+    return sum(deltas.values())
+
+
+class LocalViewBuffer:
+    """Буфер просмотров в памяти текущего процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._total = 0
+        self.last_flush = time.monotonic()
+
+    def add(self, pk, count=1):
+        """Добавить просмотры, вернуть количество незаписанных просмотров поста"""
+        with self._lock:
+            pending = self._pending.get(pk, 0) + count
+            self._pending[pk] = pending
+            self._total += count
+            return pending
+
+    def total(self):
+        return self._total
+
+    def flush(self):
+        """Перенести накопленные просмотры в БД"""
+        with self._lock:
+            deltas, self._pending = self._pending, {}
+            self._total = 0
+            self.last_flush = time.monotonic()
+
+        if not deltas:
+            return 0
+        try:
+            return _apply_deltas(deltas)
+        except Exception:
+            # Возвращаем просмотры в буфер, чтобы не потерять их при ошибке БД
+            for pk, delta in deltas.items():
+                self.add(pk, delta)
+            raise
+
+
+class CacheViewBuffer:
+    """Буфер просмотров в кеше Django, общий для всех процессов.
+
+    Счетчики уменьшаются только после успешной записи в БД, поэтому
+    просмотры, пришедшие во время сброса, остаются в буфере.
+    """
+
+    prefix = "blog:views:"
+
+    def __init__(self):
+        self.last_flush = time.monotonic()
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, "BLOG_VIEWS_CACHE_ALIAS", "default")]
+
+    def _key(self, pk):
+        return f"{self.prefix}{pk}"
+
+    @contextmanager
+    def _lock(self, name, blocking=True):
+        key = f"{self.prefix}lock:{name}"
+        while not self.cache.add(key, 1, timeout=30):
+            if not blocking:
+                yield False
+                return
+            time.sleep(0.001)
+        try:
+            yield True
+        finally:
+            self.cache.delete(key)
+
+    def _incr(self, key, count):
+        if self.cache.add(key, count, timeout=None):
+            return count
+        try:
+            return self.cache.incr(key, count)
+        except ValueError:
+            # Ключ вытеснен из кеша между add и incr
+            return self._incr(key, count)
+
+    def _decr(self, key, count):
+        try:
+            self.cache.decr(key, count)
+        except ValueError:
+            # Просмотры уже записаны в БД; ключ вытеснен после чтения
+            logger.warning("Буфер просмотров: ключ %s вытеснен из кеша во время сброса", key)
+
+    def add(self, pk, count=1):
+        """Добавить просмотры, вернуть количество незаписанных просмотров поста"""
+        pending = self._incr(self._key(pk), count)
+        self._incr(f"{self.prefix}total", count)
+        if pending == count:
+            # Счетчик был пуст — пост мог отсутствовать в индексе
+            with self._lock("index"):
+                index = self.cache.get(f"{self.prefix}index", set())
+                index.add(pk)
+                self.cache.set(f"{self.prefix}index", index, timeout=None)
+        return pending
+
+    def total(self):
+        return self.cache.get(f"{self.prefix}total", 0)
+
+    def flush(self):
+        """Перенести накопленные просмотры в БД"""
+        with self._lock("flush", blocking=False) as acquired:
+            if not acquired:
+                # Сброс уже выполняет другой процесс
+                return 0
+            self.last_flush = time.monotonic()
+
+            index = self.cache.get(f"{self.prefix}index", set())
+            values = self.cache.get_many([self._key(pk) for pk in index])
+            evicted = sorted(pk for pk in index if self._key(pk) not in values)
+            if evicted:
+                # Счетчик есть в индексе, но не в кеше: кеш вытеснил ключ
+                logger.warning(
+                    "Буфер просмотров: ключи постов %s вытеснены из кеша, просмотры потеряны",
+                    evicted,
+                )
+            deltas = {pk: values[self._key(pk)] for pk in index if values.get(self._key(pk), 0) > 0}
+            if deltas:
+                _apply_deltas(deltas)
+                for pk, delta in deltas.items():
+                    self._decr(self._key(pk), delta)
+                self._decr(f"{self.prefix}total", sum(deltas.values()))
+
+            # Убираем из индекса посты без незаписанных просмотров
+            with self._lock("index"):
+                index = self.cache.get(f"{self.prefix}index", set())
+                values = self.cache.get_many([self._key(pk) for pk in index])
+                index = {pk for pk in index if values.get(self._key(pk), 0) > 0}
+                self.cache.set(f"{self.prefix}index", index, timeout=None)
+
+            return sum(deltas.values())
+
+
+_buffers = {
+    "local": LocalViewBuffer(),
+    "cache": CacheViewBuffer(),
+}
+
+
+def get_view_buffer():
+    """Буфер просмотров, выбранный настройкой BLOG_VIEWS_BUFFER_BACKEND"""
+    return _buffers[getattr(settings, "BLOG_VIEWS_BUFFER_BACKEND", "local")]
+
+
+def record_view(pk):
+    """Учесть просмотр поста, вернуть количество незаписанных просмотров поста"""
+    buffer = get_view_buffer()
+    pending = buffer.add(pk)
+
+    threshold = getattr(settings, "BLOG_VIEWS_FLUSH_THRESHOLD", 100)
+    interval = getattr(settings, "BLOG_VIEWS_FLUSH_INTERVAL", 5.0)
+    if buffer.total() >= threshold or time.monotonic() - buffer.last_flush >= interval:
+        try:
+            buffer.flush()
+        except Exception:
+            # Просмотр уже учтен, а незаписанные просмотры остаются в буфере до
+            # следующего сброса, поэтому ошибка БД не превращает ответ в 500
+            logger.exception("Буфер просмотров: ошибка сброса, просмотры остаются в буфере")
+
+    return pending
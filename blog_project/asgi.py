@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog_project.settings')
+# Под ASGI постоянные соединения не переиспользуются между запросами и копятся
+# по потокам: соединение на запрос, для переиспользования — пул (DB_POOL=1)
+os.environ['DB_CONN_MAX_AGE'] = '0'
 
 application = get_asgi_application()
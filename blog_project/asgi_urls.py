@@ -0,0 +1,15 @@
+"""
+URL configuration for the ASGI application.
+
+Hot blog endpoints are served by async views first; everything else falls
+through to the regular URL configuration.
+"""
+
+from django.urls import include, path
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [
+    path("api/", include("blog.async_urls")),
+    *wsgi_urlpatterns,
+]
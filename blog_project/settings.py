@@ -10,6 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
+from copy import deepcopy
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.async_routing.AsyncUrlconfMiddleware',
+    'blog.timing.RequestTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -52,9 +57,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.profiling.RequestProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'blog_project.urls'
+# Маршруты запросов через ASGI: горячие эндпойнты — async-представления
+# (blog.async_routing.AsyncUrlconfMiddleware); None — те же, что под WSGI
+BLOG_ASGI_URLCONF = 'blog_project.asgi_urls'
 
 TEMPLATES = [
     {
@@ -77,12 +86,61 @@ WSGI_APPLICATION = 'blog_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# PostgreSQL, если задан DB_NAME (см. docker-compose.yml), иначе локальный SQLite
+if os.environ.get('DB_NAME'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ['DB_NAME'],
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', 'postgres'),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Постоянные соединения: не открывать новое на каждый запрос
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            # Проверять соединение перед повторным использованием
+            'CONN_HEALTH_CHECKS': env_bool('DB_CONN_HEALTH_CHECKS', True),
+            'OPTIONS': {},
+        }
     }
-}
+    if env_bool('DB_POOL'):
+        # Пул psycopg 3 (psycopg[pool]) несовместим с CONN_MAX_AGE > 0
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        }
+    if os.environ.get('DB_REPLICA_HOST'):
+        # Реплика для чтения: те же параметры (со своим пулом), другой хост.
+        # В тестах — зеркало default
+        DATABASES['replica'] = {
+            **deepcopy(DATABASES['default']),
+            'HOST': os.environ['DB_REPLICA_HOST'],
+            'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            # В профиле производительности транзакции сразу берут блокировку записи:
+            # читающая транзакция не может получить "database is locked" при переходе к записи
+            'OPTIONS': (
+                {'transaction_mode': 'IMMEDIATE'} if env_bool('BLOG_SQLITE_PERFORMANCE') else {}
+            ),
+        },
+    }
+
+DATABASE_ROUTERS = ['blog.db_router.PrimaryReplicaRouter']
 
 
 # Password validation
@@ -144,6 +202,14 @@ LOGGING = {
         'handlers': ['console'],
         'level': 'INFO',
     },
+    'loggers': {
+        # Метрики запросов RequestTimingMiddleware (BLOG_REQUEST_TIMING_ENABLED)
+        'blog.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 CKEDITOR_UPLOAD_PATH = "uploads/"
@@ -177,3 +243,105 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+
+# Blog Lite settings
+# Размер пакета для bulk_create при массовом создании постов
+BLOG_BULK_CREATE_BATCH_SIZE = 500
+# Массовое изменение и удаление постов: предел постов за запрос и размер пакета id
+BLOG_BULK_MAX_POSTS = 5000
+BLOG_BULK_WRITE_BATCH_SIZE = 500
+
+# Буферизованный счетчик просмотров (write-behind)
+BLOG_VIEWS_BUFFERED = False
+# 'local' - буфер в памяти процесса, 'cache' - общий буфер в кеше Django
+BLOG_VIEWS_BUFFER_BACKEND = 'local'
+# Алиас CACHES для буфера 'cache': без вытеснения, для нескольких процессов —
+# общий бэкенд (Redis, Memcached, БД)
+BLOG_VIEWS_CACHE_ALIAS = 'views'
+# Сброс в БД после накопления этого количества просмотров
+BLOG_VIEWS_FLUSH_THRESHOLD = 100
+# или по прошествии этого количества секунд с последнего сброса
+BLOG_VIEWS_FLUSH_INTERVAL = 5.0
+
+# Размер пачки строк, читаемых из БД при потоковой выдаче
+BLOG_STREAM_CHUNK_SIZE = 2000
+
+# Кеш (locmem работает без внешних сервисов; можно заменить на file/DB бэкенд)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Кеш ответов (BLOG_RESPONSE_CACHE_ALIAS): вытеснение ответов безопасно
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blog-responses',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Буфер просмотров: вытесненный ключ — потерянные просмотры, поэтому без
+    # ограничения числа записей
+    'views': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blog-views',
+        'OPTIONS': {
+            'MAX_ENTRIES': sys.maxsize,
+        },
+    },
+}
+
+# Версионированный кеш ответов списка и деталей постов
+BLOG_RESPONSE_CACHE_ENABLED = False
+# Алиас CACHES для кеша ответов
+BLOG_RESPONSE_CACHE_ALIAS = 'responses'
+# TTL ответов в секундах по эндпойнтам
+BLOG_RESPONSE_CACHE_TIMEOUTS = {
+    'post-list': 60,
+    'post-detail': 300,
+}
+
+# Быстрая сериализация списков постов и под-постов из .values() вместо DRF-сериализаторов
+BLOG_FAST_LIST_SERIALIZATION = True
+
+# Максимальное количество постов в запросе GET /api/posts/likes/?ids=
+BLOG_LIKE_STATE_MAX_IDS = 100
+
+# Server-Timing и лог blog.timing с количеством SQL-запросов, временем SQL,
+# сериализации и рендеринга. Выключено — middleware не участвует в обработке.
+BLOG_REQUEST_TIMING_ENABLED = False
+
+# Профилирование запросов с заголовком X-Profile: 1 (файлы в BLOG_PROFILER_DIR).
+# По умолчанию доступно только персоналу; BLOG_PROFILER_STAFF_ONLY = False — всем.
+BLOG_PROFILER_ENABLED = False
+BLOG_PROFILER_STAFF_ONLY = True
+# 'cprofile' или 'pyinstrument' (семплирующий, если установлен)
+BLOG_PROFILER_BACKEND = 'cprofile'
+BLOG_PROFILER_DIR = BASE_DIR / 'profiles'
+
+# Рейтинг популярных постов (blog/trending.py): веса лайка и просмотра и за сколько
+# секунд новизны пост получает такой же бонус, как за десятикратно больше очков
+BLOG_TRENDING_LIKE_WEIGHT = 10
+BLOG_TRENDING_VIEW_WEIGHT = 1
+BLOG_TRENDING_DECAY_SECONDS = 45000
+
+# Профиль производительности SQLite: PRAGMA для каждого нового соединения
+# (обработчик connection_created в blog/signals.py). WAL сохраняется в файле БД.
+BLOG_SQLITE_PERFORMANCE = env_bool('BLOG_SQLITE_PERFORMANCE', False)
+BLOG_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # в КиБ (отрицательное значение), т.е. 64 МиБ
+    'busy_timeout': 5000,  # мс ожидания блокировки записи
+}
+# Повторы записи при "database is locked" и начальная задержка между ними (секунды)
+BLOG_DB_LOCK_RETRIES = 3
+BLOG_DB_LOCK_BACKOFF = 0.05
+
+# Алиас реплики для чтения GET-запросов постов и под-постов (None — все в default)
+BLOG_READ_REPLICA = 'replica' if os.environ.get('DB_REPLICA_HOST') else None
+# Сколько секунд после записи пользователь читает с основной БД
+BLOG_REPLICA_STICKY_SECONDS = 5
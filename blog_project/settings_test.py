@@ -0,0 +1,17 @@
+"""
+Настройки для тестов роутера реплики на SQLite.
+
+``python manage.py test --settings=blog_project.settings_test`` добавляет вторую
+SQLite-базу под алиасом ``replica``, чтобы ``ReadReplicaTest`` мог записать в
+реплику другие данные, чем в ``default``. Рабочие настройки такого алиаса не
+содержат; без этого модуля ``ReadReplicaTest`` пропускается.
+"""
+
+from .settings import *  # noqa: F403
+from .settings import BASE_DIR, DATABASES
+
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES.setdefault(
+        "replica",
+        {"ENGINE": "django.db.backends.sqlite3", "NAME": BASE_DIR / "db_replica.sqlite3"},
+    )